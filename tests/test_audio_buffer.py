@@ -0,0 +1,41 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import yaya
+
+
+def frame(index, size=640):
+    """20 ms of 16 kHz 16-bit audio filled with one recognisable byte"""
+    return bytes([index % 256]) * size
+
+
+class SmartAudioBufferTest(unittest.TestCase):
+    def test_window_size_follows_rate_duration_and_width(self):
+        self.assertEqual(yaya.SmartAudioBuffer(16000, 60, 2).target_bytes, 1920)
+        self.assertEqual(yaya.SmartAudioBuffer(8000, 30, 1).target_bytes, 240)
+
+    def test_frames_are_coalesced_into_windows_in_order(self):
+        buffer = yaya.SmartAudioBuffer(16000, 60, 2)
+        outputs = [buffer.push(frame(i)) for i in range(6)]
+
+        self.assertEqual([output is None for output in outputs], [True, True, False, True, True, False])
+        self.assertEqual(outputs[2], frame(0) + frame(1) + frame(2))
+        self.assertEqual(outputs[5], frame(3) + frame(4) + frame(5))
+        self.assertEqual(buffer.flush_remaining(), b"")
+
+    def test_oversized_push_returns_one_window_and_keeps_the_rest(self):
+        buffer = yaya.SmartAudioBuffer(16000, 60, 2)
+        audio = bytes(range(256)) * 20  # 5120 bytes, more than two windows
+
+        self.assertEqual(buffer.push(audio), audio[:1920])
+        self.assertEqual(buffer.flush(), audio[1920:3840])
+        self.assertIsNone(buffer.flush())
+        self.assertEqual(buffer.flush_remaining(), audio[3840:])
+        self.assertEqual(buffer.flush_remaining(), b"")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import sys
+import tempfile
+import types
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import yaya
+
+
+def make_engine(cache_dir):
+    """Engine with a real LLM cache and a fake client whose embedding waits for the completion to start"""
+    engine = yaya.TutoringEngine.__new__(yaya.TutoringEngine)
+    engine.llm_cache = yaya.LLMCache(os.path.join(cache_dir, "llm_cache.db"))
+    engine.completion_started = None
+    engine.completions = 0
+
+    async def embed(text):
+        await asyncio.wait_for(engine.completion_started.wait(), 1)
+        return [1.0, 0.0, 0.0]
+
+    async def create_completion(**kwargs):
+        engine.completion_started.set()
+        engine.completions += 1
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(
+            message=types.SimpleNamespace(content=f"answer {engine.completions}"))])
+
+    engine._embed = embed
+    engine._create_completion = create_completion
+    return engine
+
+
+class CachedCompletionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_empty_scope_does_not_wait_on_embedding(self):
+        engine = make_engine(self.tmp.name)
+        messages = [{"role": "user", "content": "What is a fraction?"}]
+
+        async def run():
+            engine.completion_started = asyncio.Event()
+            return await engine._cached_completion("tutor", "Math:abc", "gpt", messages)
+
+        self.assertEqual(asyncio.run(run()), "answer 1")
+        # The embedding is still stored so later prompts in the scope can match semantically
+        self.assertTrue(engine.llm_cache.has_candidates("tutor", "Math:abc"))
+
+    def test_semantic_hit_in_populated_scope(self):
+        engine = make_engine(self.tmp.name)
+
+        async def embed(text):
+            return [1.0, 0.0, 0.0]
+
+        engine._embed = embed
+        engine.llm_cache.put("other", "tutor", "Math", [1.0, 0.01, 0.0], "cached answer")
+
+        async def run():
+            engine.completion_started = asyncio.Event()
+            return await engine._cached_completion("tutor", "Math", "gpt",
+                                                   [{"role": "user", "content": "What's a fraction?"}])
+
+        self.assertEqual(asyncio.run(run()), "cached answer")
+        self.assertEqual(engine.completions, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import yaya
+
+REPLY = "A fraction is part of a whole.\n[[FOLLOW-UPS]]\n1. What is a numerator?\n- Why can't the denominator be 0?\n3) How do you add fractions?\n4. Extra question"
+
+
+def stream(chunks):
+    """Feed chunks through a FollowupStreamFilter and return what reached the chat"""
+    shown = []
+    stream_filter = yaya.FollowupStreamFilter(shown.append)
+    for chunk in chunks:
+        stream_filter(chunk)
+    stream_filter.flush()
+    return "".join(shown), shown
+
+
+class FollowupStreamFilterTest(unittest.TestCase):
+    def test_marker_in_one_chunk(self):
+        text, _ = stream([REPLY])
+        self.assertEqual(text, "A fraction is part of a whole.\n")
+
+    def test_marker_split_at_every_position(self):
+        marker_start = REPLY.index(yaya.FOLLOWUP_MARKER)
+        for split in range(marker_start, marker_start + len(yaya.FOLLOWUP_MARKER) + 1):
+            with self.subTest(split=split):
+                text, _ = stream([REPLY[:split], REPLY[split:]])
+                self.assertEqual(text, "A fraction is part of a whole.\n")
+
+    def test_marker_split_one_character_per_chunk(self):
+        text, shown = stream(list(REPLY))
+        self.assertEqual(text, "A fraction is part of a whole.\n")
+        self.assertNotIn("", shown)
+
+    def test_marker_prefix_that_is_not_a_marker_is_flushed(self):
+        text, _ = stream(["Use [[double", " brackets]] and end with [["])
+        self.assertEqual(text, "Use [[double brackets]] and end with [[")
+
+    def test_reply_without_marker_passes_through(self):
+        chunks = ["Fractions ", "have numerators ", "and denominators."]
+        text, _ = stream(chunks)
+        self.assertEqual(text, "".join(chunks))
+
+
+class SplitFollowupsTest(unittest.TestCase):
+    def test_strips_numbering_and_keeps_three(self):
+        answer, followups = yaya.TutoringEngine._split_followups(REPLY)
+        self.assertEqual(answer, "A fraction is part of a whole.")
+        self.assertEqual(followups, ["What is a numerator?", "Why can't the denominator be 0?",
+                                     "How do you add fractions?"])
+
+    def test_missing_marker_gives_no_followups(self):
+        self.assertEqual(yaya.TutoringEngine._split_followups("Just an answer. "), ("Just an answer.", []))
+
+
+if __name__ == "__main__":
+    unittest.main()
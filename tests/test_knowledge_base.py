@@ -0,0 +1,103 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import yaya
+
+
+def md5(value):
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def make_baseline_db(path, subjects, resources):
+    """Write a knowledge base in the original format: md5 ids and no subject_name on resources"""
+    with sqlite3.connect(path) as conn:
+        conn.execute("""
+            CREATE TABLE subjects (
+                subject_id TEXT PRIMARY KEY,
+                subject_name TEXT NOT NULL,
+                description TEXT,
+                last_updated TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE resources (
+                resource_id TEXT PRIMARY KEY,
+                subject_id TEXT,
+                title TEXT NOT NULL,
+                content_type TEXT,
+                content TEXT,
+                difficulty_level TEXT,
+                FOREIGN KEY (subject_id) REFERENCES subjects (subject_id)
+            )
+        """)
+        conn.executemany("INSERT INTO subjects VALUES (?, ?, ?, '2024-01-01T00:00:00')",
+                         [(subject_id, name, f"Resources for {name}") for subject_id, name in subjects])
+        conn.executemany("INSERT INTO resources VALUES (?, ?, ?, 'text', ?, 'easy')",
+                         [(md5(title), subject_id, title, f"{title} content") for subject_id, title in resources])
+    conn.close()
+
+
+class KnowledgeBaseMigrationTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "knowledge_base.db")
+
+    def rows(self, sql):
+        with sqlite3.connect(self.path) as conn:
+            rows = conn.execute(sql).fetchall()
+        conn.close()
+        return rows
+
+    def test_baseline_ids_are_rewritten(self):
+        make_baseline_db(self.path,
+                         [(md5("Math"), "Math"), (md5("Science"), "Science")],
+                         [(md5("Math"), "Fractions"), (md5("Science"), "Cells")])
+
+        kb = yaya.LocalKnowledgeBase(self.path)
+
+        self.assertEqual(self.rows("PRAGMA user_version"), [(2,)])
+        self.assertEqual(sorted(self.rows("SELECT subject_id, subject_name FROM subjects")),
+                         sorted([(kb._make_id("Math"), "Math"), (kb._make_id("Science"), "Science")]))
+        self.assertEqual(sorted(self.rows("SELECT resource_id, subject_id, subject_name FROM resources")),
+                         sorted([(kb._make_id("Fractions"), kb._make_id("Math"), "Math"),
+                                 (kb._make_id("Cells"), kb._make_id("Science"), "Science")]))
+        self.assertEqual([r["title"] for r in kb.get_subject_resources("Math")], ["Fractions"])
+
+        # New writes use the same ids, so they update rather than duplicate migrated rows
+        self.assertTrue(kb.update_knowledge_base("Math", {"title": "Fractions", "content": "updated"}))
+        self.assertEqual(self.rows("SELECT COUNT(*), MAX(content) FROM resources WHERE title = 'Fractions'"),
+                         [(1, "updated")])
+
+    def test_duplicate_subject_names_are_merged(self):
+        make_baseline_db(self.path,
+                         [(md5("Math"), "Math"), ("legacy-math", "Math")],
+                         [(md5("Math"), "Fractions"), ("legacy-math", "Decimals")])
+
+        kb = yaya.LocalKnowledgeBase(self.path)
+
+        self.assertEqual(self.rows("SELECT subject_id, subject_name FROM subjects"),
+                         [(kb._make_id("Math"), "Math")])
+        self.assertEqual(sorted(r["title"] for r in kb.get_subject_resources("Math")), ["Decimals", "Fractions"])
+        self.assertEqual(self.rows("SELECT DISTINCT subject_id FROM resources"), [(kb._make_id("Math"),)])
+
+    def test_reopening_migrated_db_keeps_it_unchanged(self):
+        make_baseline_db(self.path, [(md5("Math"), "Math")], [(md5("Math"), "Fractions")])
+        yaya.LocalKnowledgeBase(self.path)
+        before = self.rows("SELECT * FROM resources")
+
+        kb = yaya.LocalKnowledgeBase(self.path)
+
+        self.assertEqual(self.rows("SELECT * FROM resources"), before)
+        self.assertEqual(self.rows("PRAGMA user_version"), [(2,)])
+        self.assertEqual([r["title"] for r in kb.get_subject_resources("Math")], ["Fractions"])
+
+
+if __name__ == "__main__":
+    unittest.main()
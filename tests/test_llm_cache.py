@@ -0,0 +1,86 @@
+import math
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import yaya
+
+
+def unit(angle_degrees):
+    """2-d unit vector; the cosine similarity of two of them is cos of the angle between"""
+    return [math.cos(math.radians(angle_degrees)), math.sin(math.radians(angle_degrees))]
+
+
+class LLMCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = yaya.LLMCache(os.path.join(tmp.name, "llm_cache.db"), max_entries=3)
+
+    def set_age(self, key, seconds):
+        self.cache._db.conn.execute("UPDATE llm_cache SET ts = ? WHERE sha256_key = ?", (time.time() - seconds, key))
+
+    def keys(self):
+        return sorted(row[0] for row in self.cache._db.conn.execute("SELECT sha256_key FROM llm_cache"))
+
+    def test_exact_key_depends_on_model_and_messages(self):
+        messages = [{"role": "user", "content": "What is a fraction?"}]
+        key = yaya.LLMCache.make_key("gpt-4", messages)
+        self.assertEqual(key, yaya.LLMCache.make_key("gpt-4", [dict(messages[0])]))
+        self.assertNotEqual(key, yaya.LLMCache.make_key("gpt-3.5-turbo", messages))
+
+        self.cache.put(key, "tutoring", "Math", None, "part of a whole")
+        self.assertEqual(self.cache.get(key), "part of a whole")
+        self.assertIsNone(self.cache.get(yaya.LLMCache.make_key("gpt-4", [])))
+
+    def test_expired_entries_are_not_served(self):
+        self.cache.put("old", "tutoring", "Math", unit(0), "stale")
+        self.set_age("old", self.cache.ttl_seconds + 1)
+
+        self.assertIsNone(self.cache.get("old"))
+        self.assertIsNone(self.cache.get_similar("tutoring", "Math", unit(0)))
+        self.assertFalse(self.cache.has_candidates("tutoring", "Math"))
+
+        self.cache.put("new", "tutoring", "Math", None, "fresh")
+        self.assertEqual(self.keys(), ["new"])
+
+    def test_least_recently_used_entry_is_evicted(self):
+        for age, key in ((30, "a"), (20, "b"), (10, "c")):
+            self.cache.put(key, "tutoring", "Math", None, key)
+            self.set_age(key, age)
+        self.assertEqual(self.cache.get("a"), "a")  # a hit makes "a" the most recently used
+
+        self.cache.put("d", "tutoring", "Math", None, "d")
+
+        self.assertEqual(self.keys(), ["a", "c", "d"])
+
+    def assert_similarity(self, cache):
+        cache.put("close", "quiz", "Math", unit(10), "close answer")
+        cache.put("other-scope", "quiz", "Science", unit(0), "science answer")
+
+        # The default threshold is 0.92, between cos 22° ≈ 0.927 and cos 25° ≈ 0.906
+        self.assertEqual(cache.get_similar("quiz", "Math", unit(0)), "close answer")
+        self.assertEqual(cache.get_similar("quiz", "Math", unit(32)), "close answer")
+        self.assertIsNone(cache.get_similar("quiz", "Math", unit(35)))
+        self.assertIsNone(cache.get_similar("quiz", "Math", unit(100)))
+        self.assertIsNone(cache.get_similar("tutoring", "Math", unit(10)))
+        self.assertIsNone(cache.get_similar("quiz", "Math", [1.0, 0.0, 0.0]))  # other embedding size
+
+        cache.put("closest", "quiz", "Math", unit(3), "closest answer")
+        self.assertEqual(cache.get_similar("quiz", "Math", unit(0)), "closest answer")
+
+    def test_similarity_threshold_vectorized(self):
+        self.assert_similarity(self.cache)
+
+    def test_similarity_threshold_pure_python(self):
+        with mock.patch.object(yaya.LLMCache, "_best_match_vectorized", side_effect=ImportError):
+            self.assert_similarity(self.cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
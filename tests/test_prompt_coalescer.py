@@ -0,0 +1,80 @@
+import asyncio
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import yaya
+
+
+def make_coalescer(results=None, error=None):
+    """Coalescer whose handler records each call and echoes its items back"""
+    calls = []
+
+    async def handler(key, items):
+        calls.append((key, list(items)))
+        if error:
+            raise error
+        return results(items) if results else [f"{key}:{item}" for item in items]
+
+    return yaya.PromptCoalescer(handler, window=0.01), calls
+
+
+class PromptCoalescerTest(unittest.TestCase):
+    def test_items_in_window_share_one_call_and_keep_their_results(self):
+        coalescer, calls = make_coalescer()
+
+        async def run():
+            return await asyncio.gather(*(coalescer.submit("Math", item) for item in ("a", "b", "c")))
+
+        self.assertEqual(asyncio.run(run()), ["Math:a", "Math:b", "Math:c"])
+        self.assertEqual(calls, [("Math", ["a", "b", "c"])])
+
+    def test_keys_are_batched_separately(self):
+        coalescer, calls = make_coalescer()
+
+        async def run():
+            return await asyncio.gather(coalescer.submit("Math", "a"), coalescer.submit("Science", "b"),
+                                        coalescer.submit("Math", "c"))
+
+        self.assertEqual(asyncio.run(run()), ["Math:a", "Science:b", "Math:c"])
+        self.assertEqual(sorted(calls), [("Math", ["a", "c"]), ("Science", ["b"])])
+
+    def test_item_after_window_starts_new_batch(self):
+        coalescer, calls = make_coalescer()
+
+        async def run():
+            first = await coalescer.submit("Math", "a")
+            second = await coalescer.submit("Math", "b")
+            return first, second
+
+        self.assertEqual(asyncio.run(run()), ("Math:a", "Math:b"))
+        self.assertEqual(calls, [("Math", ["a"]), ("Math", ["b"])])
+
+    def test_handler_error_reaches_every_caller(self):
+        coalescer, _ = make_coalescer(error=RuntimeError("rate limited"))
+
+        async def run():
+            return await asyncio.gather(coalescer.submit("Math", "a"), coalescer.submit("Math", "b"),
+                                        return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+    def test_short_handler_result_fails_instead_of_hanging(self):
+        coalescer, _ = make_coalescer(results=lambda items: ["only one"])
+
+        async def run():
+            return await asyncio.wait_for(
+                asyncio.gather(coalescer.submit("Math", "a"), coalescer.submit("Math", "b"), return_exceptions=True),
+                1
+            )
+
+        first, second = asyncio.run(run())
+        self.assertEqual(first, "only one")
+        self.assertIsInstance(second, ValueError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import itertools
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import yaya
+
+
+def make_engine():
+    """Engine with just the quiz state, answering completions like a model behind LLMCache"""
+    engine = yaya.TutoringEngine.__new__(yaya.TutoringEngine)
+    engine.sessions = {"s1": yaya.TutoringSession("s1", "u1", "Math", "2026-01-01T00:00:00",
+                                                  learning_objectives=["fractions"])}
+    engine._quiz_pool = {}
+    engine._quiz_refills = set()
+    engine._quiz_served = {}
+
+    numbers = itertools.count()
+    cache = {}
+    engine.api_calls = 0
+
+    def quiz():
+        return {"question": f"Q{next(numbers)}", "options": ["a", "b", "c", "d"], "correct_answer": 0}
+
+    async def cached_completion(kind, subject, model, messages, on_token=None, use_cache=True, **kwargs):
+        key = json.dumps(messages)
+        if use_cache and key in cache:
+            return cache[key]
+        engine.api_calls += 1
+        if "Request 1" in messages[-1]["content"]:
+            count = messages[-1]["content"].count("Request ")
+            content = json.dumps({str(i): quiz() for i in range(1, count + 1)})
+        else:
+            content = json.dumps(quiz())
+        if use_cache:
+            cache[key] = content
+        return content
+
+    engine._cached_completion = cached_completion
+    return engine
+
+
+async def settle():
+    """Let background pool refills finish"""
+    await asyncio.gather(*(task for task in asyncio.all_tasks() if task is not asyncio.current_task()))
+
+
+class QuizPoolTest(unittest.TestCase):
+    def test_consecutive_refills_fetch_new_questions(self):
+        engine = make_engine()
+
+        async def run():
+            engine._quiz_pool[("Math", "easy")] = yaya.deque()
+            await engine._refill_quiz_pool("s1", "easy")
+            first = [quiz["question"] for quiz in engine._quiz_pool[("Math", "easy")]]
+            engine._quiz_pool[("Math", "easy")].clear()
+            engine._quiz_served[("Math", "easy")] = yaya.deque(first)
+            await engine._refill_quiz_pool("s1", "easy")
+            second = [quiz["question"] for quiz in engine._quiz_pool[("Math", "easy")]]
+            return first, second
+
+        first, second = asyncio.run(run())
+        self.assertTrue(first)
+        self.assertTrue(second)
+        self.assertFalse(set(first) & set(second))
+
+    def test_quizzes_do_not_repeat(self):
+        engine = make_engine()
+
+        async def run():
+            questions = []
+            for _ in range(9):
+                questions.append((await engine.agenerate_quiz("s1", "easy"))["question"])
+                await settle()
+            return questions
+
+        questions = asyncio.run(run())
+        self.assertEqual(len(set(questions)), len(questions))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import yaya
+
+
+def make_engine():
+    """Engine with an in-memory summary queue and a fake Batch API"""
+    engine = yaya.TutoringEngine.__new__(yaya.TutoringEngine)
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE pending_summaries (session_id TEXT PRIMARY KEY, item TEXT NOT NULL)")
+    conn.execute("CREATE TABLE batch_jobs (batch_id TEXT, kind TEXT, items TEXT, collected INTEGER)")
+    engine._user_db = types.SimpleNamespace(conn=conn)
+    engine._summary_submit_lock = asyncio.Lock()
+    engine._summary_queued_since = None
+    engine.submitted = []
+    engine.collected = []
+
+    async def asubmit_batch(kind, items):
+        engine.submitted.append([item["session_id"] for item in items])
+        conn.execute("INSERT INTO batch_jobs VALUES (?, ?, '[]', 0)", (f"batch-{len(engine.submitted)}", kind))
+        return f"batch-{len(engine.submitted)}"
+
+    async def acollect_batch(batch_id):
+        engine.collected.append(batch_id)
+        conn.execute("UPDATE batch_jobs SET collected = 1 WHERE batch_id = ?", (batch_id,))
+        return 1
+
+    engine.asubmit_batch = asubmit_batch
+    engine.acollect_batch = acollect_batch
+    return engine
+
+
+def session(session_id):
+    return yaya.TutoringSession(session_id, "u1", "Math", "2026-01-01T00:00:00")
+
+
+class SummaryPollerTest(unittest.TestCase):
+    def test_partial_queue_submitted_after_max_wait_and_collected(self):
+        engine = make_engine()
+
+        async def run():
+            engine.loop = asyncio.get_running_loop()
+            poller = asyncio.create_task(engine._poll_summaries())
+            await asyncio.sleep(0.02)
+            engine._enqueue_summary(session("s1"))
+            await asyncio.sleep(0.03)
+            not_yet = list(engine.submitted)
+            await asyncio.sleep(0.15)
+            poller.cancel()
+            return not_yet
+
+        with mock.patch.object(yaya, "SUMMARY_POLL_INTERVAL_S", 0.01), \
+                mock.patch.object(yaya, "SUMMARY_MAX_WAIT_S", 0.1):
+            not_yet = asyncio.run(run())
+        self.assertEqual(not_yet, [])
+        self.assertEqual(engine.submitted, [["s1"]])
+        self.assertEqual(engine.collected, ["batch-1"])
+        self.assertIsNone(engine._summary_queued_since)
+
+    def test_curriculum_collection_skips_summary_batches(self):
+        engine = make_engine()
+        conn = engine._user_db.conn
+        for batch_id, kind in (("b-obj", "objectives"), ("b-sum", "summary"), ("b-quiz", "quiz")):
+            conn.execute("INSERT INTO batch_jobs VALUES (?, ?, '[]', 0)", (batch_id, kind))
+
+        self.assertEqual(asyncio.run(engine.acollect_curriculum()), 2)
+        self.assertEqual(sorted(engine.collected), ["b-obj", "b-quiz"])
+        self.assertEqual(engine.pending_batches(), ["b-sum"])
+
+    def test_batch_summary_without_rating_uses_fallback(self):
+        engine = make_engine()
+        engine.recorded = []
+        engine.record_session = lambda user_id, entry: engine.recorded.append(entry)
+        entry = {"session_id": "s1", "subject": "Math"}
+        engine.user_profiles = {"u1": types.SimpleNamespace(session_history=[entry])}
+
+        engine._apply_summary({"session_id": "s1", "user_id": "u1"}, {"topics_covered": ["fractions"]})
+
+        self.assertEqual(entry["performance_rating"], yaya.FALLBACK_SUMMARY_TEMPLATE["performance_rating"])
+        self.assertEqual(entry["topics_covered"], ["fractions"])
+        self.assertEqual(engine.recorded, [entry])
+
+
+if __name__ == "__main__":
+    unittest.main()
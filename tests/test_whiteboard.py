@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import yaya
+
+merge = yaya.ModernWhiteboard._merge_line_chains
+
+
+def line(x1, y1, x2, y2, color="#000000", width=2):
+    return {"type": "line", "x1": x1, "y1": y1, "x2": x2, "y2": y2, "color": color, "width": width}
+
+
+class MergeLineChainsTest(unittest.TestCase):
+    def test_connected_segments_become_one_stroke(self):
+        merged = merge([line(0, 0, 5, 5), line(5, 5, 10, 0), line(10, 0, 15, 5)])
+        self.assertEqual(merged, [{"type": "stroke", "points": [0, 0, 5, 5, 10, 0, 15, 5],
+                                   "color": "#000000", "width": 2, "smooth": False}])
+
+    def test_single_segment_is_kept_as_a_line(self):
+        self.assertEqual(merge([line(0, 0, 5, 5)]), [line(0, 0, 5, 5)])
+
+    def test_gap_or_style_change_starts_a_new_run(self):
+        elements = [line(0, 0, 5, 5), line(5, 5, 10, 10),
+                    line(20, 20, 25, 25),                  # not connected
+                    line(25, 25, 30, 30, color="#ff0000"),  # connected but another colour
+                    line(30, 30, 35, 35, color="#ff0000", width=4)]
+        merged = merge(elements)
+        self.assertEqual([element["type"] for element in merged], ["stroke", "line", "line", "line"])
+        self.assertEqual(merged[0]["points"], [0, 0, 5, 5, 10, 10])
+        self.assertEqual(merged[1:], elements[2:])
+
+    def test_other_elements_break_runs_and_keep_their_order(self):
+        text = {"type": "text", "x": 1, "y": 1, "text": "hi", "color": "#000000"}
+        stroke = {"type": "stroke", "points": [0, 0, 1, 1], "color": "#000000", "width": 2}
+        merged = merge([line(0, 0, 5, 5), text, line(5, 5, 10, 10), stroke])
+        self.assertEqual(merged, [line(0, 0, 5, 5), text, line(5, 5, 10, 10), stroke])
+
+    def test_empty_board(self):
+        self.assertEqual(merge([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,26 +1,33 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, filedialog, simpledialog
-import openai
+from tkinter import ttk, scrolledtext, messagebox, filedialog, simpledialog, font as tkfont
 import json
 import time
 import os
 import threading
+import queue
 import random
 import hashlib
+import secrets
 import datetime
 import sqlite3
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from PIL import Image, ImageTk, ImageOps
-import speech_recognition as sr
-import pyttsx3
-import requests
-from io import BytesIO
-from typing import Dict, List, Optional, Tuple
+import math
+import re
+import asyncio
+import importlib
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 import logging
 from abc import ABC, abstractmethod
 
+try:
+    import orjson
+except ImportError:  # optional: JSON falls back to the stdlib encoder
+    orjson = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -32,6 +39,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def json_dumps(obj) -> str:
+    """Compact JSON encoding, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(',', ':'))
+
+def json_loads(data):
+    """JSON decoding, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 # Modern UI Constants
 PRIMARY_COLOR = "#4a6fa5"  # Deep blue
 SECONDARY_COLOR = "#6b8cae"  # Lighter blue
@@ -41,8 +60,34 @@ DARK_TEXT = "#2d3748"  # Dark gray text
 LIGHT_TEXT = "#f8f9fa"  # Light text
 CARD_COLOR = "#ffffff"  # White cards
 SHADOW_COLOR = "#e2e8f0"  # Light shadow
+STREAM_REDRAW_MS = 33  # streamed tokens are flushed to the chat at most ~30 times a second
+SENDER_COLORS = {"You": PRIMARY_COLOR, "AI Tutor": SECONDARY_COLOR, "System": DARK_TEXT}  # chat name tags
+
+# Shared named fonts
+_fonts: Dict[Tuple[int, str], tkfont.Font] = {}
+
+def get_font(size: int = 10, weight: str = "normal") -> tkfont.Font:
+    """Named Segoe UI font shared by every widget of this size and weight, created once the Tk root exists"""
+    key = (size, weight)
+    if key not in _fonts:
+        _fonts[key] = tkfont.Font(family="Segoe UI", size=size, weight=weight)
+    return _fonts[key]
 
 # Modern rounded button style
+_button_hover_bound = False
+
+def bind_button_hover(widget):
+    """Register the rounded-button hover handlers once for the whole app, under the RoundedButton bind tag"""
+    global _button_hover_bound
+    if not _button_hover_bound:
+        widget.bind_class("RoundedButton", "<Enter>",
+                          lambda e: e.widget.config(highlightbackground=SECONDARY_COLOR))
+        widget.bind_class("RoundedButton", "<Leave>",
+                          lambda e: e.widget.config(highlightbackground=e.widget.idle_color))
+        _button_hover_bound = True
+    tags = widget.bindtags()
+    widget.bindtags((tags[0], "RoundedButton") + tags[1:])
+
 def create_rounded_button(parent, text, command, bg=PRIMARY_COLOR, fg=LIGHT_TEXT, radius=25, width=None):
     frame = tk.Frame(parent, bg=LIGHT_BG, width=width)
     frame.pack_propagate(False)
@@ -58,14 +103,15 @@ def create_rounded_button(parent, text, command, bg=PRIMARY_COLOR, fg=LIGHT_TEXT
         relief="flat",
         activebackground=SECONDARY_COLOR,
         activeforeground=LIGHT_TEXT,
-        font=("Segoe UI", 10)
+        font=get_font(10)
     )
     button.pack(fill="both", expand=True, padx=5, pady=5)
+    frame.button = button
     
     # Create rounded effect
     frame.config(highlightbackground=bg, highlightthickness=1)
-    frame.bind("<Enter>", lambda e: frame.config(highlightbackground=SECONDARY_COLOR))
-    frame.bind("<Leave>", lambda e: frame.config(highlightbackground=bg))
+    frame.idle_color = bg
+    bind_button_hover(frame)
     
     return frame
 
@@ -81,7 +127,7 @@ class Card(tk.Frame):
             tk.Label(
                 title_frame, 
                 text=title, 
-                font=("Segoe UI", 12, "bold"), 
+                font=get_font(12, "bold"), 
                 bg=CARD_COLOR, 
                 fg=DARK_TEXT
             ).pack(side="left")
@@ -101,7 +147,7 @@ class ModernEntry(tk.Entry):
             highlightbackground=SECONDARY_COLOR,
             highlightcolor=PRIMARY_COLOR,
             insertbackground=PRIMARY_COLOR,
-            font=("Segoe UI", 10),
+            font=get_font(10),
             **kwargs
         )
         
@@ -127,7 +173,7 @@ class ModernScrolledText(scrolledtext.ScrolledText):
         super().__init__(
             parent,
             wrap=tk.WORD,
-            font=("Segoe UI", 10),
+            font=get_font(10),
             bg=CARD_COLOR,
             fg=DARK_TEXT,
             bd=0,
@@ -152,12 +198,31 @@ class ModernRadioButton(tk.Radiobutton):
             activebackground=LIGHT_BG,
             activeforeground=DARK_TEXT,
             selectcolor=LIGHT_BG,
-            font=("Segoe UI", 10),
+            font=get_font(10),
             **kwargs
         )
 
 # Modern whiteboard
 class ModernWhiteboard(tk.Canvas):
+    # Generated-content layouts: (item type, coords, palette index, label key or None)
+    TEMPLATES = {
+        "diagram": (
+            ("rectangle", (50, 50, 250, 150), 0, None),
+            ("oval", (100, 80, 200, 130), 1, None),
+            ("line", (150, 50, 150, 150), 2, None),
+        ),
+        "concept_map": (
+            ("oval", (100, 50, 200, 100), 0, None),
+            ("text", (150, 75), 0, "concept"),
+            ("line", (150, 100, 100, 150), 1, None),
+            ("oval", (75, 150, 125, 200), 1, None),
+            ("text", (100, 175), 1, "Example"),
+            ("line", (150, 100, 200, 150), 2, None),
+            ("rectangle", (175, 150, 225, 200), 2, None),
+            ("text", (200, 175), 2, "Application"),
+        ),
+    }
+
     def __init__(self, master, **kwargs):
         super().__init__(master, bg=CARD_COLOR, bd=0, highlightthickness=1,
                         highlightbackground=SECONDARY_COLOR, highlightcolor=PRIMARY_COLOR, **kwargs)
@@ -165,9 +230,14 @@ class ModernWhiteboard(tk.Canvas):
         self.last_x = 0
         self.last_y = 0
         self.elements = []
+        self._item_elements: Dict[int, Dict] = {}  # canvas item id -> element record
         self.current_color = PRIMARY_COLOR
         self.current_tool = "pen"
         self.line_width = 2
+        self._current_stroke: List[int] = []
+        self._stroke_item = None
+        self._stroke_redraw_pending = False
+        self._template_items: Dict[str, object] = {}  # template name -> canvas item ids, created on first use
         
         # Tool panel with modern styling
         self.tool_panel = tk.Frame(master, bg=LIGHT_BG)
@@ -182,6 +252,7 @@ class ModernWhiteboard(tk.Canvas):
             ("Eraser", "eraser")
         ]
         
+        self._tool_buttons: Dict[str, tk.Frame] = {}
         for text, tool in tools:
             btn = create_rounded_button(
                 self.tool_panel,
@@ -192,6 +263,7 @@ class ModernWhiteboard(tk.Canvas):
                 radius=15
             )
             btn.pack(side="left", padx=2, pady=2)
+            self._tool_buttons[tool] = btn
         
         # Color palette
         self.color_palette = tk.Frame(master, bg=LIGHT_BG)
@@ -218,16 +290,11 @@ class ModernWhiteboard(tk.Canvas):
     def set_tool(self, tool):
         self.current_tool = tool
         # Update button styles
-        for child in self.tool_panel.winfo_children():
-            if isinstance(child, tk.Frame):
-                for subchild in child.winfo_children():
-                    if isinstance(subchild, tk.Button):
-                        if tool in subchild.cget("command").__code__.co_freevars:
-                            child.config(highlightbackground=SECONDARY_COLOR)
-                            subchild.config(bg=SECONDARY_COLOR, fg=LIGHT_TEXT)
-                        else:
-                            child.config(highlightbackground=LIGHT_BG)
-                            subchild.config(bg=LIGHT_BG, fg=DARK_TEXT)
+        for name, frame in self._tool_buttons.items():
+            active = name == tool
+            frame.config(highlightbackground=SECONDARY_COLOR if active else LIGHT_BG)
+            frame.button.config(bg=SECONDARY_COLOR if active else LIGHT_BG,
+                                fg=LIGHT_TEXT if active else DARK_TEXT)
         
     def set_color(self, color):
         self.current_color = color
@@ -237,12 +304,18 @@ class ModernWhiteboard(tk.Canvas):
         self.last_x = event.x
         self.last_y = event.y
         
-        if self.current_tool == "text":
+        if self.current_tool == "pen":
+            # One polyline per stroke, extended in place as the pointer moves
+            self._current_stroke = [event.x, event.y]
+            self._stroke_item = self.create_line(event.x, event.y, event.x, event.y,
+                                                 fill=self.current_color, width=self.line_width,
+                                                 smooth=True, splinesteps=12, capstyle=tk.ROUND)
+        elif self.current_tool == "text":
             text = simpledialog.askstring("Text", "Enter text:")
             if text:
                 item = self.create_text(event.x, event.y, text=text, fill=self.current_color, 
-                                      font=("Segoe UI", 10))
-                self.elements.append({
+                                      font=get_font(10))
+                self._add_element(item, {
                     "type": "text",
                     "x": event.x,
                     "y": event.y,
@@ -255,27 +328,60 @@ class ModernWhiteboard(tk.Canvas):
         if not self.drawing:
             return
             
-        if self.current_tool == "pen":
-            self.create_line(self.last_x, self.last_y, event.x, event.y, 
-                            fill=self.current_color, width=self.line_width)
-            self.elements.append({
-                "type": "line",
-                "x1": self.last_x,
-                "y1": self.last_y,
-                "x2": event.x,
-                "y2": event.y,
-                "color": self.current_color,
-                "width": self.line_width
-            })
+        if self.current_tool == "pen" and self._stroke_item is not None:
+            self._current_stroke.extend((event.x, event.y))
+            # Redraw at most ~60 times a second no matter how fast motion events arrive
+            if not self._stroke_redraw_pending:
+                self._stroke_redraw_pending = True
+                self.after(16, self._flush_stroke)
+            
+        elif self.current_tool == "eraser":
+            self._erase_at(event.x, event.y)
             
         self.last_x = event.x
         self.last_y = event.y
+
+    def _add_element(self, item, element):
+        self.elements.append(element)
+        self._item_elements[item] = element
+
+    def _erase_at(self, x, y, radius=10):
+        """Delete the items under the eraser and drop their element records"""
+        erased = set()
+        for item in self.find_overlapping(x - radius, y - radius, x + radius, y + radius):
+            if "template" in self.gettags(item):
+                self.itemconfigure(item, state="hidden")
+                continue
+            element = self._item_elements.pop(item, None)
+            if element is not None:
+                erased.add(id(element))
+            self.delete(item)
+        if erased:
+            self.elements = [element for element in self.elements if id(element) not in erased]
+
+    def _flush_stroke(self):
+        self._stroke_redraw_pending = False
+        if self._stroke_item is not None and len(self._current_stroke) >= 4:
+            self.coords(self._stroke_item, *self._current_stroke)
         
     def stop_draw(self, event):
-        if self.current_tool == "line":
+        if self.current_tool == "pen" and self._stroke_item is not None:
+            self._flush_stroke()
+            if len(self._current_stroke) >= 4:
+                self._add_element(self._stroke_item, {
+                    "type": "stroke",
+                    "points": self._current_stroke,
+                    "color": self.current_color,
+                    "width": self.line_width
+                })
+            else:
+                self.delete(self._stroke_item)
+            self._current_stroke = []
+            self._stroke_item = None
+        elif self.current_tool == "line":
             item = self.create_line(self.last_x, self.last_y, event.x, event.y, 
                                   fill=self.current_color, width=self.line_width)
-            self.elements.append({
+            self._add_element(item, {
                 "type": "line",
                 "x1": self.last_x,
                 "y1": self.last_y,
@@ -287,7 +393,7 @@ class ModernWhiteboard(tk.Canvas):
         elif self.current_tool == "rectangle":
             item = self.create_rectangle(self.last_x, self.last_y, event.x, event.y,
                                        outline=self.current_color, width=self.line_width)
-            self.elements.append({
+            self._add_element(item, {
                 "type": "rectangle",
                 "x1": self.last_x,
                 "y1": self.last_y,
@@ -299,7 +405,7 @@ class ModernWhiteboard(tk.Canvas):
         elif self.current_tool == "oval":
             item = self.create_oval(self.last_x, self.last_y, event.x, event.y,
                                   outline=self.current_color, width=self.line_width)
-            self.elements.append({
+            self._add_element(item, {
                 "type": "oval",
                 "x1": self.last_x,
                 "y1": self.last_y,
@@ -309,31 +415,89 @@ class ModernWhiteboard(tk.Canvas):
                 "width": self.line_width
             })
         elif self.current_tool == "eraser":
-            self.create_rectangle(event.x-10, event.y-10, event.x+10, event.y+10,
-                                outline=CARD_COLOR, fill=CARD_COLOR)
+            self._erase_at(event.x, event.y)
             
         self.drawing = False
         
     def clear(self):
-        self.delete("all")
+        self.delete("!template")
+        self.itemconfigure("template", state="hidden")
         self.elements = []
-        
+        self._item_elements = {}
+
+    def show_template(self, name: str, title: str, colors: List[str], labels: Dict[str, str]):
+        """Show one of TEMPLATES, recolouring and relabelling items that are created only once"""
+        if not self._template_items:
+            self._template_items["title"] = self.create_text(150, 20, font=get_font(12, "bold"),
+                                                             state="hidden", tags=("template",))
+            for template, shapes in self.TEMPLATES.items():
+                self._template_items[template] = [
+                    getattr(self, f"create_{kind}")(*coords, state="hidden", tags=("template", template),
+                                                    **({} if kind == "text" else {"width": 2}))
+                    for kind, coords, _, _ in shapes
+                ]
+
+        self.itemconfigure("template", state="hidden")
+        self.itemconfigure(self._template_items["title"], text=title, fill=colors[0], state="normal")
+        for item, (kind, _, color, label) in zip(self._template_items[name], self.TEMPLATES[name]):
+            options = {"state": "normal", "outline" if kind in ("rectangle", "oval") else "fill": colors[color]}
+            if label:
+                options["text"] = labels.get(label, label)
+            self.itemconfigure(item, **options)
+        
+    @staticmethod
+    def _merge_line_chains(elements):
+        """Fold runs of connected, same-style line segments into single polyline strokes"""
+        runs = []
+        for element in elements:
+            if element["type"] == "line" and runs and runs[-1][-1]["type"] == "line":
+                last = runs[-1][-1]
+                if ((last["x2"], last["y2"]) == (element["x1"], element["y1"])
+                        and (last["color"], last["width"]) == (element["color"], element["width"])):
+                    runs[-1].append(element)
+                    continue
+            runs.append([element])
+
+        merged = []
+        for run in runs:
+            if len(run) == 1:
+                merged.append(run[0])
+                continue
+            points = [run[0]["x1"], run[0]["y1"]]
+            for segment in run:
+                points.extend((segment["x2"], segment["y2"]))
+            merged.append({
+                "type": "stroke",
+                "points": points,
+                "color": run[0]["color"],
+                "width": run[0]["width"],
+                "smooth": False
+            })
+        return merged
+
     def load_elements(self, elements):
         self.clear()
-        for element in elements:
-            if element["type"] == "line":
-                self.create_line(element["x1"], element["y1"], element["x2"], element["y2"],
-                                fill=element["color"], width=element["width"])
+        for element in self._merge_line_chains(elements):
+            if element["type"] == "stroke":
+                smooth = element.get("smooth", True)
+                item = self.create_line(*element["points"], fill=element["color"], width=element["width"],
+                                        smooth=smooth, splinesteps=12, capstyle=tk.ROUND)
+            elif element["type"] == "line":
+                item = self.create_line(element["x1"], element["y1"], element["x2"], element["y2"],
+                                        fill=element["color"], width=element["width"])
             elif element["type"] == "rectangle":
-                self.create_rectangle(element["x1"], element["y1"], element["x2"], element["y2"],
-                                    outline=element["color"], width=element["width"])
+                item = self.create_rectangle(element["x1"], element["y1"], element["x2"], element["y2"],
+                                             outline=element["color"], width=element["width"])
             elif element["type"] == "oval":
-                self.create_oval(element["x1"], element["y1"], element["x2"], element["y2"],
-                               outline=element["color"], width=element["width"])
+                item = self.create_oval(element["x1"], element["y1"], element["x2"], element["y2"],
+                                        outline=element["color"], width=element["width"])
             elif element["type"] == "text":
                 font = element.get("font", "Segoe UI 10")
-                self.create_text(element["x"], element["y"], text=element["text"],
-                               fill=element["color"], font=font)
+                item = self.create_text(element["x"], element["y"], text=element["text"],
+                                        fill=element["color"], font=font)
+            else:
+                continue
+            self._add_element(item, element)
 
 @dataclass
 class UserProfile:
@@ -356,6 +520,10 @@ class TutoringSession:
     messages: List[Dict] = None
     learning_objectives: List[str] = None
     whiteboard_data: List[Dict] = None
+    cached_system: str = ""
+    summary: str = ""
+    summarized_upto: int = 0
+    transcript_parts: List[str] = None
 
     def __post_init__(self):
         if self.messages is None:
@@ -364,6 +532,62 @@ class TutoringSession:
             self.learning_objectives = []
         if self.whiteboard_data is None:
             self.whiteboard_data = []
+        if self.transcript_parts is None:
+            self.transcript_parts = [f"{msg['role']}: {msg['content']}" for msg in self.messages]
+
+    def add_message(self, role: str, content: str):
+        """Append a message and its transcript line"""
+        self.messages.append({"role": role, "content": content})
+        self.transcript_parts.append(f"{role}: {content}")
+
+    def transcript(self, max_chars: Optional[int] = None, start: int = 0, end: Optional[int] = None) -> str:
+        """Join transcript lines, keeping only the most recent ones that fit in max_chars"""
+        parts = self.transcript_parts[start:end]
+        if max_chars is not None:
+            kept, total = 0, 0
+            for part in reversed(parts):
+                total += len(part) + 1
+                if total > max_chars and kept:
+                    break
+                kept += 1
+            parts = parts[len(parts) - kept:]
+        return "\n".join(parts)
+
+class SQLiteStore:
+    """Persistent per-thread SQLite connections in WAL mode"""
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+    )
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            for pragma in self.PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self, mode: str = "DEFERRED"):
+        """Yield a cursor inside an explicit BEGIN/COMMIT, rolling back on error"""
+        cursor = self.conn.cursor()
+        cursor.execute(f"BEGIN {mode}")
+        try:
+            yield cursor
+            cursor.execute("COMMIT")
+        except BaseException:
+            cursor.execute("ROLLBACK")
+            raise
 
 class KnowledgeBase(ABC):
     @abstractmethod
@@ -377,11 +601,22 @@ class KnowledgeBase(ABC):
 class LocalKnowledgeBase(KnowledgeBase):
     def __init__(self, db_path: str = "knowledge_base.db"):
         self.db_path = db_path
+        self._db = SQLiteStore(db_path)
+        self.version = 0  # bumped on every update so callers can invalidate derived caches
+        self._resource_cache: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._resource_cache_size = 128
+        self._subject_ids: Dict[str, str] = {}
         self._initialize_db()
 
+    @staticmethod
+    def _make_id(value: Optional[str]) -> Optional[str]:
+        """Derive a stable 128-bit id from a name"""
+        if value is None:
+            return None
+        return hashlib.blake2b(value.encode(), digest_size=16).hexdigest()
+
     def _initialize_db(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        with self._db.transaction() as cursor:
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS subjects (
                     subject_id TEXT PRIMARY KEY,
@@ -398,81 +633,594 @@ class LocalKnowledgeBase(KnowledgeBase):
                     content_type TEXT,
                     content TEXT,
                     difficulty_level TEXT,
+                    subject_name TEXT,
                     FOREIGN KEY (subject_id) REFERENCES subjects (subject_id)
                 )
             """)
-            conn.commit()
+
+            # Schema version 1: resources carry their subject name so lookups skip the join
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] < 1:
+                cursor.execute("PRAGMA table_info(resources)")
+                if "subject_name" not in [column[1] for column in cursor.fetchall()]:
+                    cursor.execute("ALTER TABLE resources ADD COLUMN subject_name TEXT")
+                cursor.execute("""
+                    UPDATE resources SET subject_name = (
+                        SELECT s.subject_name FROM subjects s WHERE s.subject_id = resources.subject_id
+                    ) WHERE subject_name IS NULL
+                """)
+                # Subject names become unique; resources now find their subject by name, so extra rows can go
+                cursor.execute("""
+                    DELETE FROM subjects WHERE rowid NOT IN (
+                        SELECT MIN(rowid) FROM subjects GROUP BY subject_name
+                    )
+                """)
+                cursor.execute("PRAGMA user_version = 1")
+
+            # Schema version 2: ids are BLAKE2b digests of the subject name / resource title
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] < 2:
+                self._db.conn.create_function("blake2b_id", 1, self._make_id, deterministic=True)
+                cursor.execute("UPDATE subjects SET subject_id = blake2b_id(subject_name)")
+                cursor.execute("""
+                    UPDATE resources SET resource_id = blake2b_id(title),
+                                         subject_id = blake2b_id(subject_name)
+                """)
+                cursor.execute("PRAGMA user_version = 2")
+
+            cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_subjects_name ON subjects(subject_name)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_resources_subject ON resources(subject_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_resources_lookup ON resources(subject_name, difficulty_level)")
 
     def get_subject_resources(self, subject: str) -> List[Dict]:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT r.title, r.content_type, r.content, r.difficulty_level
-                FROM resources r
-                JOIN subjects s ON r.subject_id = s.subject_id
-                WHERE s.subject_name = ?
-            """, (subject,))
-            rows = cursor.fetchall()
-            return [{
-                'title': row[0],
-                'type': row[1],
-                'content': row[2],
-                'difficulty': row[3]
-            } for row in rows]
+        cached = self._resource_cache.get(subject)
+        if cached is not None:
+            self._resource_cache.move_to_end(subject)
+            return cached
+
+        cursor = self._db.conn.cursor()
+        cursor.execute("""
+            SELECT title, content_type, content, difficulty_level
+            FROM resources
+            WHERE subject_name = ?
+        """, (subject,))
+        rows = cursor.fetchall()
+        resources = [{
+            'title': row[0],
+            'type': row[1],
+            'content': row[2],
+            'difficulty': row[3]
+        } for row in rows]
+
+        self._resource_cache[subject] = resources
+        if len(self._resource_cache) > self._resource_cache_size:
+            self._resource_cache.popitem(last=False)
+        return resources
 
     def update_knowledge_base(self, subject: str, content: Dict) -> bool:
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Check if subject exists
-                cursor.execute("SELECT subject_id FROM subjects WHERE subject_name = ?", (subject,))
-                subject_row = cursor.fetchone()
-                
-                if not subject_row:
-                    subject_id = hashlib.md5(subject.encode()).hexdigest()
-                    cursor.execute(
-                        "INSERT INTO subjects VALUES (?, ?, ?, ?)",
-                        (subject_id, subject, f"Resources for {subject}", datetime.datetime.now().isoformat())
-                    )
-                else:
-                    subject_id = subject_row[0]
+            with self._db.transaction("IMMEDIATE") as cursor:
+                # Check if subject exists (known subjects skip the lookup entirely)
+                subject_id = self._subject_ids.get(subject)
+                if subject_id is None:
+                    cursor.execute("SELECT subject_id FROM subjects WHERE subject_name = ?", (subject,))
+                    subject_row = cursor.fetchone()
+
+                    if not subject_row:
+                        subject_id = self._make_id(subject)
+                        cursor.execute(
+                            "INSERT INTO subjects VALUES (?, ?, ?, ?)",
+                            (subject_id, subject, f"Resources for {subject}", datetime.datetime.now().isoformat())
+                        )
+                    else:
+                        subject_id = subject_row[0]
                 
                 # Insert/update resource
-                resource_id = hashlib.md5(content['title'].encode()).hexdigest()
+                resource_id = self._make_id(content['title'])
                 cursor.execute(
-                    """INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?, ?, ?)""",
+                    """INSERT OR REPLACE INTO resources
+                       (resource_id, subject_id, title, content_type, content, difficulty_level, subject_name)
+                       VALUES (?, ?, ?, ?, ?, ?, ?)""",
                     (
                         resource_id,
                         subject_id,
                         content['title'],
                         content.get('type', 'text'),
                         content['content'],
-                        content.get('difficulty', 'intermediate')
+                        content.get('difficulty', 'intermediate'),
+                        subject
                     )
                 )
-                conn.commit()
+            self._subject_ids[subject] = subject_id
+            self._resource_cache.pop(subject, None)
+            self.version += 1
             return True
         except Exception as e:
             logger.error(f"Error updating knowledge base: {e}")
             return False
 
+EMBEDDING_MODEL = "text-embedding-3-small"
+BATCHED_PROMPT_LIMIT = 5  # prompts packed into one numbered completion
+QUIZ_PREFETCH = 3  # quiz questions generated ahead per (subject, difficulty) while the student answers
+QUIZ_AVOID_LIMIT = 20  # recently served questions listed in quiz prompts so the model does not repeat them
+TTS_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "tutoring", "tts")
+TTS_CACHE_MAX_CHARS = 200  # only short, likely-repeated phrases are cached as audio
+AVATAR_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "tutoring", "avatars")
+HISTORY_TOKEN_BUDGET = 1500  # tokens of recent conversation re-sent each turn
+SUMMARY_EVERY_TURNS = 6  # fold older turns into the rolling summary this often
+USER_SAVE_DELAY_S = 0.5  # profile changes made within this window are written together
+VOICE_SAMPLE_RATE = 16000
+VOICE_FRAME_MS = 20  # microphone read size
+VOICE_WINDOW_MS = 60  # frames are coalesced into windows of this length for voice activity checks
+VOICE_END_SILENCE_MS = 600  # trailing silence that ends an utterance
+STT_BATCH_LIMIT = 4  # utterances queued behind a running recognition are sent together, up to this many
+STT_BATCH_GAP_MS = 300  # silence inserted between batched utterances
+FALLBACK_SUMMARY_TEMPLATE = {
+    "topics_covered": ["Core concepts of {subject}"],
+    "key_learnings": [
+        "Introduction to {subject}",
+        "Basic principles and concepts"
+    ],
+    "suggested_next_steps": [
+        "Review basic {subject} concepts",
+        "Practice with more examples"
+    ],
+    "performance_rating": 3,
+    "areas_for_improvement": ["Advanced {subject} concepts"],
+    "learning_style_insights": "Visual learning seemed effective",
+    "recommended_resources": []
+}
+SUMMARY_TRANSCRIPT_MAX_CHARS = 32000  # ~8k tokens of the most recent conversation go into a summary
+SUMMARY_BATCH_SIZE = 10  # queued session summaries submitted together through the Batch API
+SUMMARY_MAX_WAIT_S = 600  # a queued summary is submitted after this long even if the batch is not full
+SUMMARY_POLL_INTERVAL_S = 60  # how often the engine checks the summary queue and in-flight summary batches
+FOLLOWUP_MARKER = "[[FOLLOW-UPS]]"  # separates the tutor's answer from its follow-up questions
+
+# Static prompts never interpolate anything, so every request shares a cacheable prefix
+TUTOR_SYSTEM_PROMPT = """You are an expert K-12 tutor. The next system message gives the subject, learning objectives, available resources and the student's learning style.
+
+Provide detailed, educational responses that:
+- Explain concepts clearly using age-appropriate language
+- Use techniques suited to the student's learning style
+- Provide real-world examples relevant to students
+- Include visual descriptions when appropriate
+- Break down complex ideas into simpler parts
+- Encourage critical thinking with probing questions
+- Suggest hands-on activities when applicable
+- Relate concepts to student interests when possible
+
+After your answer, write a line containing only [[FOLLOW-UPS]] followed by 3 follow-up questions, one per line, that would deepen the student's understanding."""
+
+TUTOR_SESSION_TEMPLATE = """Subject: {subject}
+Current learning objectives: {objectives}
+Available resources: {resources}
+Student learning style: {learning_style}"""
+
+SUMMARY_SYSTEM_PROMPT = """You are a session analyzer for K-12 education. Provide well-formatted JSON output.
+
+Analyze the K-12 tutoring session given by the user and generate a comprehensive summary.
+
+Provide a JSON response with these fields:
+- topics_covered: list of main topics discussed
+- key_learnings: 3-5 key takeaways
+- suggested_next_steps: recommendations for future study
+- performance_rating: 1-5 rating of student engagement
+- areas_for_improvement: concepts needing more work
+- learning_style_insights: observations about learning style
+- recommended_resources: suggested learning materials"""
+
+class LLMCache:
+    """Exact-match and semantic cache for LLM responses, stored in SQLite"""
+
+    def __init__(self, db_path: str = "llm_cache.db", similarity_threshold: float = 0.92,
+                 ttl_seconds: int = 24 * 60 * 60, max_entries: int = 5000, scan_limit: int = 500):
+        self.db_path = db_path
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.scan_limit = scan_limit
+        self._db = SQLiteStore(db_path)
+        self._initialize_db()
+
+    def _initialize_db(self):
+        with self._db.transaction() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    sha256_key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    subject TEXT,
+                    prompt_embedding BLOB,
+                    response TEXT NOT NULL,
+                    ts REAL NOT NULL
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_scope ON llm_cache(kind, subject, ts)")
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict]) -> str:
+        """Hash the request payload for exact-match lookups"""
+        payload = json.dumps({"model": model, "messages": messages}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for an exact key, if still fresh"""
+        now = time.time()
+        cursor = self._db.conn.cursor()
+        cursor.execute(
+            "SELECT response FROM llm_cache WHERE sha256_key = ? AND ts > ?",
+            (key, now - self.ttl_seconds)
+        )
+        row = cursor.fetchone()
+        if row:
+            cursor.execute("UPDATE llm_cache SET ts = ? WHERE sha256_key = ?", (now, key))
+            return row[0]
+        return None
+
+    def has_candidates(self, kind: str, subject: str) -> bool:
+        """Return whether the scope holds any fresh embedded rows a semantic lookup could match"""
+        row = self._db.conn.execute(
+            """SELECT 1 FROM llm_cache
+               WHERE kind = ? AND subject = ? AND ts > ? AND prompt_embedding IS NOT NULL LIMIT 1""",
+            (kind, subject, time.time() - self.ttl_seconds)
+        ).fetchone()
+        return row is not None
+
+    def get_similar(self, kind: str, subject: str, embedding: List[float]) -> Optional[str]:
+        """Return the closest cached response in the same scope above the similarity threshold"""
+        now = time.time()
+        cursor = self._db.conn.cursor()
+        cursor.execute(
+            """SELECT sha256_key, prompt_embedding, response FROM llm_cache
+               WHERE kind = ? AND subject = ? AND ts > ? AND prompt_embedding IS NOT NULL
+               ORDER BY ts DESC LIMIT ?""",
+            (kind, subject, now - self.ttl_seconds, self.scan_limit)
+        )
+        rows = cursor.fetchall()
+        try:
+            best_key, best_response = self._best_match_vectorized(embedding, rows)
+        except ImportError:  # optional: similarity search falls back to pure Python
+            best_key, best_response, best_score = None, None, self.similarity_threshold
+            for key, blob, response in rows:
+                score = self._cosine_similarity(embedding, self._decode_embedding(blob))
+                if score > best_score:
+                    best_key, best_response, best_score = key, response, score
+
+        if best_key:
+            cursor.execute("UPDATE llm_cache SET ts = ? WHERE sha256_key = ?", (now, best_key))
+        return best_response
+
+    def put(self, key: str, kind: str, subject: str, embedding: Optional[List[float]], response: str):
+        """Store a response and evict the least recently used rows over capacity"""
+        blob = self._encode_embedding(embedding) if embedding else None
+        try:
+            with self._db.transaction("IMMEDIATE") as cursor:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, kind, subject, blob, response, time.time())
+                )
+                cursor.execute("DELETE FROM llm_cache WHERE ts <= ?", (time.time() - self.ttl_seconds,))
+                cursor.execute(
+                    """DELETE FROM llm_cache WHERE sha256_key IN (
+                           SELECT sha256_key FROM llm_cache ORDER BY ts DESC LIMIT -1 OFFSET ?
+                       )""",
+                    (self.max_entries,)
+                )
+        except Exception as e:
+            logger.error(f"Error writing LLM cache: {e}")
+
+    def _best_match_vectorized(self, embedding: List[float], rows: List[Tuple]) -> Tuple[Optional[str], Optional[str]]:
+        """Score all candidate rows with one matrix-vector product"""
+        import numpy as np
+
+        query = np.asarray(embedding, dtype=np.float32)
+        width = query.nbytes
+        rows = [row for row in rows if len(row[1]) == width]
+        if not rows:
+            return None, None
+
+        matrix = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), -1)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = (matrix @ query) / np.where(norms == 0, 1.0, norms)
+        best = int(np.argmax(scores))
+        if scores[best] <= self.similarity_threshold:
+            return None, None
+        return rows[best][0], rows[best][2]
+
+    @staticmethod
+    def _encode_embedding(embedding: List[float]) -> bytes:
+        return array("f", embedding).tobytes()
+
+    @staticmethod
+    def _decode_embedding(blob: bytes) -> array:
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector
+
+    @staticmethod
+    def _cosine_similarity(a, b) -> float:
+        if len(a) != len(b):
+            return 0.0
+        dot = sum(x * y for x, y in zip(a, b))
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return dot / norm if norm else 0.0
+
+class RateLimiter:
+    """Token-bucket throttle for OpenAI request and token budgets per minute"""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._available_requests = float(rpm)
+        self._available_tokens = float(tpm)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._available_requests = min(self.rpm, self._available_requests + self.rpm * elapsed / 60)
+        self._available_tokens = min(self.tpm, self._available_tokens + self.tpm * elapsed / 60)
+
+    async def acquire(self, tokens: int):
+        """Wait until the budget allows one more request of the given size"""
+        tokens = min(tokens, self.tpm)
+        while True:
+            async with self._lock:
+                self._refill()
+                if self._available_requests >= 1 and self._available_tokens >= tokens:
+                    self._available_requests -= 1
+                    self._available_tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self._available_requests) * 60 / self.rpm,
+                    (tokens - self._available_tokens) * 60 / self.tpm
+                )
+            await asyncio.sleep(max(wait, 0.01))
+
+    def update_from_headers(self, headers):
+        """Clamp the local budget to what the API reports as remaining"""
+        try:
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_requests is not None:
+                self._available_requests = min(self._available_requests, float(remaining_requests))
+            if remaining_tokens is not None:
+                self._available_tokens = min(self._available_tokens, float(remaining_tokens))
+        except (TypeError, ValueError):
+            pass
+
+class PromptCoalescer:
+    """Group prompts that arrive within a short window into one batched call per key"""
+
+    def __init__(self, handler: Callable, window: float = 0.05):
+        self.handler = handler  # async (key, items) -> results in the same order
+        self.window = window
+        self._pending: Dict[str, List[Tuple[object, asyncio.Future]]] = {}
+
+    async def submit(self, key: str, item):
+        """Queue one item and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((item, future))
+        if len(pending) == 1:
+            asyncio.create_task(self._drain_after_window(key))
+        return await future
+
+    async def _drain_after_window(self, key: str):
+        await asyncio.sleep(self.window)
+        batch = self._pending.pop(key)
+        try:
+            results = await self.handler(key, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        # A handler that returned too few results must not leave callers waiting forever
+        for _, future in batch[len(results):]:
+            if not future.done():
+                future.set_exception(ValueError(f"No result for coalesced item ({len(results)} of {len(batch)})"))
+
+class FollowupStreamFilter:
+    """Forward streamed tokens up to FOLLOWUP_MARKER and hold back everything after it"""
+
+    def __init__(self, on_token: Callable[[str], None]):
+        self.on_token = on_token
+        self._tail = ""
+        self._done = False
+
+    def __call__(self, delta: str):
+        if self._done:
+            return
+        text = self._tail + delta
+        index = text.find(FOLLOWUP_MARKER)
+        if index != -1:
+            self._done = True
+            self._tail = ""
+            if index:
+                self.on_token(text[:index])
+            return
+
+        # Keep back any suffix that could be the start of a marker split across tokens
+        keep = next((n for n in range(min(len(text), len(FOLLOWUP_MARKER) - 1), 0, -1)
+                     if FOLLOWUP_MARKER.startswith(text[-n:])), 0)
+        self._tail = text[len(text) - keep:]
+        if len(text) > keep:
+            self.on_token(text[:len(text) - keep])
+
+    def flush(self):
+        """Forward a held-back tail that turned out not to be a marker"""
+        if self._tail and not self._done:
+            self.on_token(self._tail)
+        self._tail = ""
+
+class SmartAudioBuffer:
+    """Coalesce small PCM frames into fixed-duration windows"""
+
+    def __init__(self, sample_rate: int = VOICE_SAMPLE_RATE, target_duration_ms: int = VOICE_WINDOW_MS,
+                 sample_width: int = 2):
+        self.target_bytes = sample_rate * target_duration_ms // 1000 * sample_width
+        self._buffer = bytearray()
+
+    def push(self, frame: bytes) -> Optional[bytes]:
+        """Add a frame and return a full window once enough audio is buffered"""
+        self._buffer.extend(frame)
+        return self.flush()
+
+    def flush(self) -> Optional[bytes]:
+        """Return one full window if available"""
+        if len(self._buffer) < self.target_bytes:
+            return None
+        window = bytes(self._buffer[:self.target_bytes])
+        del self._buffer[:self.target_bytes]
+        return window
+
+    def flush_remaining(self) -> bytes:
+        """Return whatever is buffered, even if shorter than a window"""
+        rest = bytes(self._buffer)
+        self._buffer.clear()
+        return rest
+
 class TutoringEngine:
-    def __init__(self, api_key: str, knowledge_base: KnowledgeBase):
-        openai.api_key = api_key
+    def __init__(self, api_key: str, knowledge_base: KnowledgeBase, llm_cache: Optional[LLMCache] = None,
+                 max_concurrency: int = 8, rpm: int = 500, tpm: int = 80000):
+        import httpx
+        import openai
+
+        # One pooled HTTP client for every OpenAI call; HTTP/2 multiplexing when h2 is installed
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        self.client = openai.AsyncOpenAI(
+            api_key=api_key,
+            http_client=httpx.AsyncClient(
+                http2=http2,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+                timeout=httpx.Timeout(60.0, connect=5.0)
+            )
+        )
         self.knowledge_base = knowledge_base
+        self.llm_cache = llm_cache if llm_cache is not None else LLMCache()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._rate_limiter = RateLimiter(rpm, tpm)
+
+        # Background event loop so OpenAI calls never run on the Tk thread
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name="tutoring-engine-loop", daemon=True).start()
+
+        self._user_db = SQLiteStore("user_data.db")
+        # Single writer keeps history rows in order and keeps disk I/O off the caller's thread
+        self._history_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-writer")
+        self._stt_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stt")
+        self._resources_context_cache: Dict[str, Tuple[int, str]] = {}
+        self._dirty_user_ids = set()
+        self._dirty_lock = threading.Lock()  # the Tk thread marks profiles dirty while the writer thread saves them
+        self._save_scheduled = False
+        self._encoding = None  # tiktoken encoding, or False when tiktoken is not installed
+        self._summarizing = set()
+        self._summary_submit_lock = asyncio.Lock()
+        self._summary_queued_since: Optional[float] = None  # monotonic time the oldest queued summary was added
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._followup_coalescer = PromptCoalescer(self._generate_followup_question_sets)
+        self._quiz_pool: Dict[Tuple[str, str], deque] = {}
+        self._quiz_refills = set()
+        self._quiz_served: Dict[Tuple[str, str], deque] = {}  # recently served question texts
         self.sessions: Dict[str, TutoringSession] = {}
         self.user_profiles: Dict[str, UserProfile] = {}
-        self.speech_engine = pyttsx3.init()
-        self.voice_recognizer = sr.Recognizer()
+        self._voice_recognizer = None
+        self._vad = None
+        self._voice_energy_threshold = None
+        self._mic_device_index = None
+        self._stt_pending: deque = deque()
+        self._stt_running = False
+        self._stt_warmed = False
         self.load_user_data()
 
+        # Text-to-speech runs on one worker thread that owns the engine
+        self.speech_engine = None
+        self._play_wav = None
+        self.tts_ready = threading.Event()
+        self._tts_queue = queue.Queue()
+        threading.Thread(target=self._tts_worker, name="tts-worker", daemon=True).start()
+
+        # Pick up summaries queued or submitted in earlier runs, then keep polling, without blocking startup
+        self._summary_poller = asyncio.run_coroutine_threadsafe(self._poll_summaries(), self.loop)
+
+    def _init_tts(self):
+        try:
+            import pyttsx3
+            self.speech_engine = pyttsx3.init()
+            self._play_wav = self._find_wav_player()
+            if self._play_wav:
+                os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        except Exception as e:
+            logger.error(f"Could not initialize text-to-speech: {e}")
+        finally:
+            self.tts_ready.set()
+
+    @staticmethod
+    def _find_wav_player() -> Optional[Callable[[str], None]]:
+        """Return a blocking WAV player, or None if no audio backend is available"""
+        try:
+            import winsound
+            return lambda path: winsound.PlaySound(path, winsound.SND_FILENAME)
+        except ImportError:
+            pass
+        try:
+            import simpleaudio
+            return lambda path: simpleaudio.WaveObject.from_wave_file(path).play().wait_done()
+        except ImportError:
+            return None
+
+    @staticmethod
+    def _tts_cache_path(text: str) -> str:
+        normalized = " ".join(text.lower().split())
+        key = hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+        return os.path.join(TTS_CACHE_DIR, f"{key}.wav")
+
+    def _speak(self, text: str):
+        """Speak text, replaying cached audio for short phrases heard before"""
+        if not self._play_wav or len(text) > TTS_CACHE_MAX_CHARS:
+            self.speech_engine.say(text)
+            self.speech_engine.runAndWait()
+            return
+
+        path = self._tts_cache_path(text)
+        if not os.path.exists(path):
+            self.speech_engine.save_to_file(text, path)
+            self.speech_engine.runAndWait()
+        self._play_wav(path)
+
+    def _tts_worker(self):
+        """Initialize the TTS engine and speak queued text one utterance at a time"""
+        self._init_tts()
+        while True:
+            text = self._tts_queue.get()
+            if self.speech_engine is None:
+                continue
+            try:
+                self._speak(text)
+            except Exception as e:
+                logger.error(f"Text-to-speech error: {e}")
+
+    @property
+    def voice_recognizer(self):
+        """Speech recognizer, created on first use"""
+        if self._voice_recognizer is None:
+            import speech_recognition as sr
+            self._voice_recognizer = sr.Recognizer()
+        return self._voice_recognizer
+
     def load_user_data(self):
         """Load user profiles and sessions from database"""
         try:
-            with sqlite3.connect("user_data.db") as conn:
-                cursor = conn.cursor()
-                
+            with self._user_db.transaction() as cursor:
                 # Create tables if not exists
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS users (
@@ -485,6 +1233,32 @@ class TutoringEngine:
                         avatar_path TEXT
                     )
                 """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS batch_jobs (
+                        batch_id TEXT PRIMARY KEY,
+                        kind TEXT,
+                        items TEXT,
+                        submitted_at TEXT,
+                        collected INTEGER DEFAULT 0
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS session_history (
+                        session_id TEXT PRIMARY KEY,
+                        user_id TEXT NOT NULL,
+                        start_time TEXT,
+                        entry TEXT NOT NULL
+                    )
+                """)
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_session_history_user ON session_history(user_id, start_time)"
+                )
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS pending_summaries (
+                        session_id TEXT PRIMARY KEY,
+                        item TEXT NOT NULL
+                    )
+                """)
                 
                 # Load users
                 cursor.execute("SELECT * FROM users")
@@ -495,72 +1269,254 @@ class TutoringEngine:
                         name=user[1],
                         learning_style=user[2],
                         proficiency_level=user[3],
-                        preferred_subjects=json.loads(user[4]),
-                        session_history=json.loads(user[5]),
+                        preferred_subjects=json_loads(user[4]),
+                        session_history=[],
                         avatar_path=user[6]
                     )
+
+                    # Move histories stored inline on the user row into the session_history table
+                    legacy_history = json_loads(user[5] or "[]")
+                    if legacy_history:
+                        cursor.executemany(
+                            "INSERT OR IGNORE INTO session_history VALUES (?, ?, ?, ?)",
+                            [self._session_history_row(user[0], entry) for entry in legacy_history]
+                        )
+                        cursor.execute("UPDATE users SET session_history = '[]' WHERE user_id = ?", (user[0],))
+
+                cursor.execute("SELECT user_id, entry FROM session_history ORDER BY start_time")
+                for user_id, entry in cursor.fetchall():
+                    if user_id in self.user_profiles:
+                        self.user_profiles[user_id].session_history.append(json_loads(entry))
                 
                 logger.info(f"Loaded {len(self.user_profiles)} user profiles")
         except Exception as e:
             logger.warning(f"Could not load user data: {e}")
 
+    def update_user_profile(self, profile: UserProfile):
+        """Register a new or changed profile so the next save writes it"""
+        self.user_profiles[profile.user_id] = profile
+        with self._dirty_lock:
+            self._dirty_user_ids.add(profile.user_id)
+
     def save_user_data(self):
-        """Save user profiles and sessions to database"""
+        """Save changed user profiles to database"""
+        # Swap the set out first so changes made while writing are picked up by the next save
+        with self._dirty_lock:
+            dirty, self._dirty_user_ids = self._dirty_user_ids, set()
+        dirty_ids = [user_id for user_id in dirty if user_id in self.user_profiles]
+        if not dirty_ids:
+            return
+
         try:
-            with sqlite3.connect("user_data.db") as conn:
-                cursor = conn.cursor()
-                
-                # Save all users
-                for user_id, profile in self.user_profiles.items():
-                    cursor.execute(
-                        """INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                        (
-                            user_id,
-                            profile.name,
-                            profile.learning_style,
-                            profile.proficiency_level,
-                            json.dumps(profile.preferred_subjects),
-                            json.dumps(profile.session_history),
-                            profile.avatar_path
-                        )
-                    )
-                
-                conn.commit()
-                logger.info(f"Saved {len(self.user_profiles)} user profiles")
+            rows = [
+                (
+                    user_id,
+                    self.user_profiles[user_id].name,
+                    self.user_profiles[user_id].learning_style,
+                    self.user_profiles[user_id].proficiency_level,
+                    json_dumps(self.user_profiles[user_id].preferred_subjects),
+                    "[]",  # session history lives in the session_history table
+                    self.user_profiles[user_id].avatar_path
+                )
+                for user_id in dirty_ids
+            ]
+
+            # Save changed users in a single transaction
+            with self._user_db.transaction("IMMEDIATE") as cursor:
+                cursor.executemany("""INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?, ?, ?)""", rows)
+            logger.info(f"Saved {len(rows)} user profiles")
         except Exception as e:
+            with self._dirty_lock:
+                self._dirty_user_ids.update(dirty_ids)
             logger.error(f"Error saving user data: {e}")
 
+    def schedule_save(self):
+        """Save changed profiles on the writer thread shortly, folding in any further changes made meanwhile"""
+        if self._save_scheduled:
+            return
+        self._save_scheduled = True
+        self.loop.call_soon_threadsafe(self.loop.call_later, USER_SAVE_DELAY_S, self._flush_save)
+
+    def _flush_save(self):
+        self._save_scheduled = False
+        self._history_writer.submit(self.save_user_data)
+
+    @staticmethod
+    def _session_history_row(user_id: str, entry: Dict) -> Tuple:
+        return (
+            entry.get("session_id") or secrets.token_hex(16),
+            user_id,
+            entry.get("start_time"),
+            json_dumps(entry)
+        )
+
+    def record_session(self, user_id: str, entry: Dict):
+        """Append one finished session to a user's history on the background writer thread"""
+        self._history_writer.submit(self._write_session_row, self._session_history_row(user_id, entry))
+
+    def _write_session_row(self, row: Tuple):
+        try:
+            self._user_db.conn.execute("INSERT OR REPLACE INTO session_history VALUES (?, ?, ?, ?)", row)
+        except Exception as e:
+            logger.error(f"Error recording session history: {e}")
+
+    def _resources_context(self, subject: str) -> str:
+        """Return the resource snippet interpolated into tutoring prompts, cached per knowledge base version"""
+        version = getattr(self.knowledge_base, "version", None)
+        cached = self._resources_context_cache.get(subject)
+        if cached is not None and version is not None and cached[0] == version:
+            return cached[1]
+
+        resources = self.knowledge_base.get_subject_resources(subject)
+        context = "\n".join(
+            f"Resource: {res['title']}\nContent: {res['content'][:200]}..."
+            for res in resources[:3]
+        )
+        if version is not None:
+            self._resources_context_cache[subject] = (version, context)
+        return context
+
+    def close(self):
+        """Close pooled OpenAI connections and stop the engine loop"""
+        try:
+            self._run(self.client.close())
+        except Exception as e:
+            logger.warning(f"Error closing OpenAI client: {e}")
+        self._summary_poller.cancel()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._history_writer.shutdown(wait=True)
+        self._stt_executor.shutdown(wait=False)
+        self.save_user_data()  # anything still waiting on schedule_save
+
+    def _run(self, coro):
+        """Run a coroutine on the engine loop and block until it finishes (never call from the loop itself)"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def _create_completion(self, **kwargs):
+        """Issue a chat completion within the concurrency and rate limits"""
+        estimated_tokens = sum(len(msg["content"]) for msg in kwargs["messages"]) // 4 + kwargs.get("max_tokens", 512)
+        async with self._semaphore:
+            await self._rate_limiter.acquire(estimated_tokens)
+            raw = await self.client.chat.completions.with_raw_response.create(**kwargs)
+            self._rate_limiter.update_from_headers(raw.headers)
+            return raw.parse()
+
+    async def _stream_completion(self, on_token: Callable[[str], None], **kwargs) -> str:
+        """Stream a chat completion, passing each content delta to on_token, and return the full text"""
+        estimated_tokens = sum(len(msg["content"]) for msg in kwargs["messages"]) // 4 + kwargs.get("max_tokens", 512)
+        parts = []
+        async with self._semaphore:
+            await self._rate_limiter.acquire(estimated_tokens)
+            raw = await self.client.chat.completions.with_raw_response.create(stream=True, **kwargs)
+            self._rate_limiter.update_from_headers(raw.headers)
+            async for chunk in raw.parse():
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    on_token(delta)
+        return "".join(parts)
+
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        """Embed text for semantic cache lookups"""
+        try:
+            response = await self.client.embeddings.create(model=EMBEDDING_MODEL, input=text)
+            return response.data[0].embedding
+        except Exception as e:
+            logger.warning(f"Could not embed prompt for cache lookup: {e}")
+            return None
+
+    async def _cached_completion(self, kind: str, subject: str, model: str, messages: List[Dict],
+                                 on_token: Optional[Callable[[str], None]] = None, use_cache: bool = True,
+                                 **kwargs) -> str:
+        """Return the completion text, serving exact or semantically similar prompts from the cache"""
+        if not use_cache:
+            # Callers that need a fresh answer every time, such as quiz refills
+            if on_token:
+                return await self._stream_completion(on_token, model=model, messages=messages, **kwargs)
+            response = await self._create_completion(model=model, messages=messages, **kwargs)
+            return response.choices[0].message.content
+
+        # Semantic hits stay within one (kind, subject) scope, so callers fold into subject
+        # anything a hit must agree on, such as the conversation so far
+        key = LLMCache.make_key(model, messages)
+        cached = self.llm_cache.get(key)
+        embedding, embedding_task = None, None
+        if cached is None:
+            prompt = messages[-1]["content"]
+            if self.llm_cache.has_candidates(kind, subject):
+                embedding = await self._embed(prompt)
+                if embedding:
+                    cached = self.llm_cache.get_similar(kind, subject, embedding)
+                    if cached is not None:
+                        logger.info(f"LLM cache hit ({kind}, semantic)")
+            else:
+                # Nothing in scope could match (e.g. a tutor turn with new history), so only
+                # embed for storage and let the request start without waiting on it
+                embedding_task = asyncio.ensure_future(self._embed(prompt))
+        else:
+            logger.info(f"LLM cache hit ({kind}, exact)")
+
+        if cached is not None:
+            if on_token:
+                on_token(cached)
+            return cached
+
+        if on_token:
+            content = await self._stream_completion(on_token, model=model, messages=messages, **kwargs)
+        else:
+            response = await self._create_completion(model=model, messages=messages, **kwargs)
+            content = response.choices[0].message.content
+        if embedding_task is not None:
+            embedding = await embedding_task
+        self.llm_cache.put(key, kind, subject, embedding, content)
+        return content
+
     def start_session(self, user_id: str, subject: str) -> TutoringSession:
         """Initialize a new tutoring session"""
-        session_id = hashlib.sha256(
-            f"{user_id}{subject}{datetime.datetime.now().isoformat()}".encode()
-        ).hexdigest()
-        
+        return self._run(self.astart_session(user_id, subject))
+
+    async def astart_session(self, user_id: str, subject: str) -> TutoringSession:
+        """Initialize a new tutoring session, warming objectives and resources concurrently"""
+        session_id = secrets.token_hex(16)
+
+        learning_objectives, _ = await asyncio.gather(
+            self._generate_learning_objectives(subject),
+            asyncio.get_running_loop().run_in_executor(None, self._resources_context, subject)
+        )
+
         session = TutoringSession(
             session_id=session_id,
             user_id=user_id,
             subject=subject,
             start_time=datetime.datetime.now().isoformat(),
-            learning_objectives=self._generate_learning_objectives(subject)
+            learning_objectives=learning_objectives
         )
-        
+
         self.sessions[session_id] = session
         logger.info(f"Started new session {session_id} for user {user_id}")
         return session
 
-    def _generate_learning_objectives(self, subject: str) -> List[str]:
+    @staticmethod
+    def _objectives_request(subject: str) -> Dict:
+        """Build the completion request for a subject's learning objectives"""
+        return {
+            "model": "gpt-4",
+            "messages": [
+                {"role": "system", "content": f"Generate 3-5 key learning objectives for {subject} for K-12 students considering different learning styles."},
+                {"role": "user", "content": f"List the most important learning objectives for studying {subject} at K-12 level."}
+            ],
+            "temperature": 0.7
+        }
+
+    @staticmethod
+    def _parse_objectives(content: str) -> List[str]:
+        return [obj.strip() for obj in content.split('\n') if obj.strip()]
+
+    async def _generate_learning_objectives(self, subject: str) -> List[str]:
         """Generate learning objectives for the subject"""
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": f"Generate 3-5 key learning objectives for {subject} for K-12 students considering different learning styles."},
-                    {"role": "user", "content": f"List the most important learning objectives for studying {subject} at K-12 level."}
-                ],
-                temperature=0.7
-            )
-            objectives = response.choices[0].message["content"].split('\n')
-            return [obj.strip() for obj in objectives if obj.strip()]
+            content = await self._cached_completion("objectives", subject, **self._objectives_request(subject))
+            return self._parse_objectives(content)
         except Exception as e:
             logger.error(f"Error generating learning objectives: {e}")
             return [
@@ -569,60 +1525,57 @@ class TutoringEngine:
                 f"Develop critical thinking in {subject}"
             ]
 
-    def get_tutoring_response(self, session_id: str, user_query: str) -> Tuple[str, Optional[List[str]]]:
-        """Get AI response for user query with contextual follow-ups"""
+    def get_tutoring_response(self, session_id: str, user_query: str,
+                              on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, Optional[List[str]]]:
+        """Get AI response for user query with contextual follow-ups, streaming tokens to on_token if given"""
+        return self._run(self.aget_tutoring_response(session_id, user_query, on_token))
+
+    async def aget_tutoring_response(self, session_id: str, user_query: str,
+                                     on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, Optional[List[str]]]:
+        """Async variant of get_tutoring_response"""
         if session_id not in self.sessions:
             raise ValueError("Invalid session ID")
             
         session = self.sessions[session_id]
-        context = "\n".join([msg['content'] for msg in session.messages[-5:]])
         
         try:
-            # Get relevant resources from knowledge base
-            resources = self.knowledge_base.get_subject_resources(session.subject)
-            resources_context = "\n".join(
-                f"Resource: {res['title']}\nContent: {res['content'][:200]}..."
-                for res in resources[:3]
-            )
-            
-            # Get user profile for personalized learning
-            user_profile = self.user_profiles.get(session.user_id, None)
-            learning_style = user_profile.learning_style if user_profile else "unknown"
-            
-            # Generate AI response with more detailed instructions
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": f"""
-                        You are an expert K-12 tutor in {session.subject}. 
-                        Current learning objectives: {', '.join(session.learning_objectives)}
-                        Available resources: {resources_context}
-                        Student learning style: {learning_style}
-                        
-                        Provide detailed, educational responses that:
-                        - Explain concepts clearly using age-appropriate language
-                        - Use {learning_style} learning style techniques
-                        - Provide real-world examples relevant to students
-                        - Include visual descriptions when appropriate
-                        - Break down complex ideas into simpler parts
-                        - Encourage critical thinking with probing questions
-                        - Suggest hands-on activities when applicable
-                        - Relate concepts to student interests when possible
-                    """},
-                    *session.messages[-5:],
-                    {"role": "user", "content": user_query}
-                ],
-                temperature=0.7
-            )
-            
-            ai_response = response.choices[0].message["content"]
+            # Turns in one session run one at a time so history is never reordered
+            async with self._session_locks.setdefault(session_id, asyncio.Lock()):
+                session_context = self._tutoring_session_context(session)
+                history = self._history_messages(session)
+
+                # Semantic hits must share the exact conversation context, not just a similar question
+                context_chain = hashlib.sha256(json_dumps([session_context, history]).encode()).hexdigest()
+
+                # One completion carries both the answer and its follow-up questions
+                stream_filter = FollowupStreamFilter(on_token or (lambda delta: None))
+                content = await self._cached_completion(
+                    "tutoring",
+                    f"{session.subject}:{context_chain}",
+                    model="gpt-4",
+                    messages=[
+                        {"role": "system", "content": TUTOR_SYSTEM_PROMPT},
+                        {"role": "system", "content": session_context},
+                        *history,
+                        {"role": "user", "content": user_query}
+                    ],
+                    on_token=stream_filter,
+                    temperature=0.7
+                )
+                stream_filter.flush()
+                ai_response, followups = self._split_followups(content)
             
-            # Update session context
-            session.messages.append({"role": "user", "content": user_query})
-            session.messages.append({"role": "assistant", "content": ai_response})
+                # Update session context
+                session.add_message("user", user_query)
+                session.add_message("assistant", ai_response)
+                if (len(session.messages) - session.summarized_upto >= 2 * SUMMARY_EVERY_TURNS
+                        and session.session_id not in self._summarizing):
+                    self._summarizing.add(session.session_id)
+                    asyncio.create_task(self._update_rolling_summary(session))
             
-            # Generate follow-up questions
-            followups = self._generate_followup_questions(session.subject, ai_response)
+            # Fall back to a separate request if the model left out the follow-ups
+            if not followups:
+                followups = await self._generate_followup_questions(session.subject, ai_response)
             
             return ai_response, followups
             
@@ -630,35 +1583,147 @@ class TutoringEngine:
             logger.error(f"Error generating tutoring response: {e}")
             return f"An error occurred: {str(e)}", None
 
-    def _generate_followup_questions(self, subject: str, context: str) -> List[str]:
-        """Generate relevant follow-up questions"""
+    @staticmethod
+    def _split_followups(content: str) -> Tuple[str, List[str]]:
+        """Split a tutor completion into the answer and up to 3 follow-up questions"""
+        answer, _, tail = content.partition(FOLLOWUP_MARKER)
+        questions = [re.sub(r"^(?:[-*•]|\d+[.)])\s*", "", line.strip()) for line in tail.split('\n')]
+        return answer.strip(), [q for q in questions if q][:3]
+
+    def _tutoring_session_context(self, session: TutoringSession) -> str:
+        """Build the per-session context message once so every turn sends an identical, cacheable prefix"""
+        if session.cached_system:
+            return session.cached_system
+
+        # Get relevant resources from knowledge base
+        resources_context = self._resources_context(session.subject)
+        
+        # Get user profile for personalized learning
+        user_profile = self.user_profiles.get(session.user_id, None)
+        learning_style = user_profile.learning_style if user_profile else "unknown"
+
+        session.cached_system = TUTOR_SESSION_TEMPLATE.format(
+            subject=session.subject,
+            objectives=", ".join(session.learning_objectives),
+            resources=resources_context,
+            learning_style=learning_style
+        )
+        return session.cached_system
+
+    def _count_tokens(self, text: str) -> int:
+        if self._encoding is None:
+            try:
+                import tiktoken
+                self._encoding = tiktoken.encoding_for_model("gpt-4")
+            except ImportError:  # optional: token counts fall back to a character estimate
+                self._encoding = False
+        if not self._encoding:
+            return len(text) // 4 + 1
+        return len(self._encoding.encode(text))
+
+    def _history_messages(self, session: TutoringSession) -> List[Dict]:
+        """Return the rolling summary plus as many recent messages as fit in HISTORY_TOKEN_BUDGET"""
+        budget = HISTORY_TOKEN_BUDGET
+        history = []
+        if session.summary:
+            history.append({"role": "system", "content": f"Summary of the earlier conversation: {session.summary}"})
+            budget -= self._count_tokens(session.summary)
+
+        recent = []
+        for msg in reversed(session.messages[session.summarized_upto:]):
+            budget -= self._count_tokens(msg['content'])
+            if budget < 0 and recent:
+                break
+            recent.append(msg)
+        return history + recent[::-1]
+
+    async def _update_rolling_summary(self, session: TutoringSession):
+        """Fold all but the last two turns into the session's rolling summary"""
+        upto = len(session.messages) - 4
+
+        transcript = session.transcript(start=session.summarized_upto, end=upto)
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
+            response = await self._create_completion(
+                model="gpt-3.5-turbo",
                 messages=[
-                    {"role": "system", "content": f"Generate 3 insightful follow-up questions about {subject} for K-12 students."},
-                    {"role": "user", "content": f"Based on this context: {context}\n\nGenerate 3 follow-up questions that would deepen understanding of {subject} for K-12 students."}
+                    {"role": "system", "content": f"Summarize this {session.subject} tutoring conversation in under 150 words, keeping what the student has learned and struggled with."},
+                    {"role": "user", "content": f"Earlier summary: {session.summary or 'None'}\n\nNew conversation:\n{transcript}"}
+                ],
+                temperature=0.3,
+                max_tokens=250
+            )
+            session.summary = response.choices[0].message.content.strip()
+            session.summarized_upto = upto
+        except Exception as e:
+            logger.warning(f"Could not update conversation summary: {e}")
+        finally:
+            self._summarizing.discard(session.session_id)
+
+    async def _batched_generate(self, kind: str, subject: str, system: str, user_prompts: List[str], **kwargs) -> List:
+        """Answer several prompts with one numbered JSON completion per BATCHED_PROMPT_LIMIT prompts"""
+        if len(user_prompts) == 1:
+            content = await self._cached_completion(
+                kind, subject, model="gpt-4",
+                messages=[{"role": "system", "content": system}, {"role": "user", "content": user_prompts[0]}],
+                **kwargs
+            )
+            return [content]
+
+        async def run_chunk(chunk: List[str]) -> List:
+            numbered = "\n\n".join(f"Request {i}:\n{prompt.strip()}" for i, prompt in enumerate(chunk, 1))
+            content = await self._cached_completion(
+                kind, subject, model="gpt-4",
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": (
+                        f"Answer each numbered request independently. Respond with a JSON object whose keys are "
+                        f"the request numbers \"1\" to \"{len(chunk)}\" and whose values are the answers.\n\n{numbered}"
+                    )}
+                ],
+                **dict(kwargs, response_format={"type": "json_object"})
+            )
+            answers = json_loads(content)
+            return [answers.get(str(i)) for i in range(1, len(chunk) + 1)]
+
+        chunks = [user_prompts[i:i + BATCHED_PROMPT_LIMIT] for i in range(0, len(user_prompts), BATCHED_PROMPT_LIMIT)]
+        results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        return [answer for chunk_answers in results for answer in chunk_answers]
+
+    async def _generate_followup_questions(self, subject: str, context: str) -> List[str]:
+        """Generate relevant follow-up questions, sharing one request with other sessions asking at the same time"""
+        return await self._followup_coalescer.submit(subject, context)
+
+    async def _generate_followup_question_sets(self, subject: str, contexts: List[str]) -> List[List[str]]:
+        """Generate follow-up questions for several contexts in one request"""
+        try:
+            answers = await self._batched_generate(
+                "followups",
+                subject,
+                f"Generate 3 insightful follow-up questions about {subject} for K-12 students.",
+                [
+                    f"Based on this context: {context}\n\nGenerate 3 follow-up questions that would deepen understanding of {subject} for K-12 students."
+                    for context in contexts
                 ],
                 temperature=0.7
             )
-            questions = response.choices[0].message["content"].split('\n')
-            return [q.strip() for q in questions if q.strip()][:3]
+            question_sets = []
+            for answer in answers:
+                questions = answer if isinstance(answer, list) else str(answer or "").split('\n')
+                question_sets.append([str(q).strip() for q in questions if str(q).strip()][:3])
+            return question_sets
         except Exception as e:
             logger.error(f"Error generating follow-up questions: {e}")
-            return []
+            return [[] for _ in contexts]
 
-    def generate_quiz(self, session_id: str, difficulty: str = "medium") -> Dict:
-        """Generate a quiz question for the session"""
-        if session_id not in self.sessions:
-            raise ValueError("Invalid session ID")
-            
-        session = self.sessions[session_id]
-        
-        try:
-            prompt = f"""
-                Generate a {difficulty} difficulty multiple-choice quiz question about {session.subject} 
+    @staticmethod
+    def _quiz_request(subject: str, difficulty: str, learning_objectives: List[str],
+                      avoid: Optional[List[str]] = None) -> Dict:
+        """Build the completion request for one quiz question, steering away from the questions in avoid"""
+        objectives = ', '.join(learning_objectives) if learning_objectives else f"core concepts of {subject}"
+        prompt = f"""
+                Generate a {difficulty} difficulty multiple-choice quiz question about {subject} 
                 with 4 options and specify the correct answer. The question should relate to these 
-                learning objectives: {', '.join(session.learning_objectives)} and be appropriate for K-12 students.
+                learning objectives: {objectives} and be appropriate for K-12 students.
                 
                 Format your response as JSON with these fields:
                 - question: the question text
@@ -667,18 +1732,50 @@ class TutoringEngine:
                 - explanation: brief explanation of the answer
                 - visual_description: description of an image that could help explain the concept
             """
+        if avoid:
+            prompt += "\nDo not repeat any of these questions the student has already seen:\n" + \
+                "\n".join(f"- {question}" for question in avoid)
+        return {
+            "model": "gpt-4",
+            "messages": [
+                {"role": "system", "content": "You are a quiz generator for K-12 students. Provide well-formatted JSON output."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.5,
+            "response_format": {"type": "json_object"}
+        }
+
+    def generate_quiz(self, session_id: str, difficulty: str = "medium") -> Dict:
+        """Generate a quiz question for the session"""
+        return self._run(self.agenerate_quiz(session_id, difficulty))
+
+    async def agenerate_quiz(self, session_id: str, difficulty: str = "medium") -> Dict:
+        """Async variant of generate_quiz"""
+        if session_id not in self.sessions:
+            raise ValueError("Invalid session ID")
             
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a quiz generator for K-12 students. Provide well-formatted JSON output."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.5,
-                response_format={"type": "json_object"}
-            )
-            
-            quiz_data = json.loads(response.choices[0].message["content"])
+        session = self.sessions[session_id]
+        pool = self._quiz_pool.setdefault((session.subject, difficulty), deque(maxlen=16))
+        served = self._quiz_served.setdefault((session.subject, difficulty), deque(maxlen=QUIZ_AVOID_LIMIT))
+        
+        try:
+            if pool:
+                quiz_data = pool.popleft()
+            else:
+                # Only the first question may come from the cache; later ones must be new
+                content = await self._cached_completion(
+                    "quiz",
+                    f"{session.subject}:{difficulty}",
+                    use_cache=not served,
+                    **self._quiz_request(session.subject, difficulty, session.learning_objectives, list(served))
+                )
+                quiz_data = json_loads(content)
+            served.append(quiz_data.get("question"))
+
+            # Top the pool up in the background so the next quiz is ready immediately
+            if not pool and (session.subject, difficulty) not in self._quiz_refills:
+                self._quiz_refills.add((session.subject, difficulty))
+                asyncio.create_task(self._refill_quiz_pool(session_id, difficulty))
             return quiz_data
             
         except Exception as e:
@@ -691,10 +1788,26 @@ class TutoringEngine:
                 "visual_description": "An illustration showing the basic concept"
             }
 
-    def generate_whiteboard_content(self, concept: str) -> Dict:
-        """Generate whiteboard content for a concept"""
+    async def _refill_quiz_pool(self, session_id: str, difficulty: str):
+        """Prefetch QUIZ_PREFETCH new questions for the session's subject and difficulty, bypassing the LLM cache"""
+        subject = self.sessions[session_id].subject
         try:
-            prompt = f"""
+            pool = self._quiz_pool[(subject, difficulty)]
+            served = self._quiz_served.get((subject, difficulty), ())
+            known = [question for question in [*served, *(quiz.get("question") for quiz in pool)] if question]
+            seen = set(known)
+            for quiz in await self.agenerate_quiz_bank(session_id, QUIZ_PREFETCH, difficulty,
+                                                       avoid=known[-QUIZ_AVOID_LIMIT:], use_cache=False):
+                if quiz.get("question") not in seen:
+                    seen.add(quiz.get("question"))
+                    pool.append(quiz)
+        finally:
+            self._quiz_refills.discard((subject, difficulty))
+
+    @staticmethod
+    def _whiteboard_request(concept: str) -> Dict:
+        """Build the completion request for a concept's whiteboard content"""
+        prompt = f"""
                 Generate content for an interactive whiteboard to explain: {concept} to K-12 students.
                 Provide a JSON response with:
                 - title: short title
@@ -704,18 +1817,63 @@ class TutoringEngine:
                 - color_scheme: suggested colors
                 - learning_activities: suggested hands-on activities
             """
-            
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a whiteboard content generator for K-12 education."},
-                    {"role": "user", "content": prompt}
-                ],
+        return {
+            "model": "gpt-4",
+            "messages": [
+                {"role": "system", "content": "You are a whiteboard content generator for K-12 education."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.5,
+            "response_format": {"type": "json_object"}
+        }
+
+    async def agenerate_quiz_bank(self, session_id: str, n: int = 5, difficulty: str = "medium",
+                                  avoid: Optional[List[str]] = None, use_cache: bool = True) -> List[Dict]:
+        """Generate n quiz questions, one per learning objective, in batched requests"""
+        if session_id not in self.sessions:
+            raise ValueError("Invalid session ID")
+
+        session = self.sessions[session_id]
+        objectives = session.learning_objectives or [f"core concepts of {session.subject}"]
+        requests_ = [
+            self._quiz_request(session.subject, difficulty, [objectives[i % len(objectives)]], avoid)
+            for i in range(n)
+        ]
+
+        try:
+            answers = await self._batched_generate(
+                "quiz",
+                f"{session.subject}:{difficulty}",
+                requests_[0]["messages"][0]["content"],
+                [request["messages"][1]["content"] for request in requests_],
                 temperature=0.5,
-                response_format={"type": "json_object"}
+                response_format={"type": "json_object"},
+                use_cache=use_cache
             )
-            
-            return json.loads(response.choices[0].message["content"])
+        except Exception as e:
+            logger.error(f"Error generating quiz bank: {e}")
+            return []
+
+        quizzes = []
+        for answer in answers:
+            try:
+                quiz = json_loads(answer) if isinstance(answer, str) else answer
+                if isinstance(quiz, dict) and "question" in quiz and "options" in quiz:
+                    quizzes.append(quiz)
+            except ValueError:
+                continue
+        return quizzes
+
+    def generate_whiteboard_content(self, concept: str) -> Dict:
+        """Generate whiteboard content for a concept"""
+        return self._run(self.agenerate_whiteboard_content(concept))
+
+    async def agenerate_whiteboard_content(self, concept: str) -> Dict:
+        """Async variant of generate_whiteboard_content"""
+        try:
+            content = await self._cached_completion("whiteboard", "", **self._whiteboard_request(concept))
+
+            return json_loads(content)
             
         except Exception as e:
             logger.error(f"Error generating whiteboard content: {e}")
@@ -728,14 +1886,210 @@ class TutoringEngine:
                 "learning_activities": []
             }
 
+    def _batch_request(self, kind: str, item: Dict) -> Dict:
+        """Build the completion request body for one batch item"""
+        if kind == "objectives":
+            return self._objectives_request(item["subject"])
+        if kind == "quiz":
+            return self._quiz_request(item["subject"], item.get("difficulty", "medium"),
+                                      item.get("learning_objectives", []))
+        if kind == "whiteboard":
+            return self._whiteboard_request(item["concept"])
+        if kind == "summary":
+            return self._summary_request(item["subject"], item["learning_objectives"], item["transcript"])
+        raise ValueError(f"Unsupported batch kind: {kind}")
+
+    async def asubmit_batch(self, kind: str, items: List[Dict]) -> str:
+        """Submit many generations through the OpenAI Batch API and return the batch id"""
+        lines = [
+            json_dumps({
+                "custom_id": f"{kind}-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._batch_request(kind, item)
+            })
+            for i, item in enumerate(items)
+        ]
+        batch_file = await self.client.files.create(
+            file=("batch.jsonl", "\n".join(lines).encode()),
+            purpose="batch"
+        )
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+
+        self._user_db.conn.execute(
+            "INSERT INTO batch_jobs VALUES (?, ?, ?, ?, 0)",
+            (batch.id, kind, json_dumps(items), datetime.datetime.now().isoformat())
+        )
+
+        logger.info(f"Submitted {kind} batch {batch.id} with {len(items)} requests")
+        return batch.id
+
+    async def asubmit_curriculum(self, subject: str) -> List[str]:
+        """Submit objectives and quiz batches for a subject and return their batch ids"""
+        return list(await asyncio.gather(
+            self.asubmit_batch("objectives", [{"subject": subject}]),
+            self.asubmit_batch("quiz", [
+                {"subject": subject, "difficulty": difficulty}
+                for difficulty in ("easy", "medium", "hard")
+                for _ in range(5)
+            ])
+        ))
+
+    async def acollect_curriculum(self) -> int:
+        """Collect finished objectives and quiz batches and return how many resources were stored"""
+        # Summary batches belong to the summary poller
+        batch_ids = self.pending_batches("objectives") + self.pending_batches("quiz")
+        return sum([await self.acollect_batch(batch_id) for batch_id in batch_ids])
+
+    def pending_batches(self, kind: Optional[str] = None) -> List[str]:
+        """Return ids of submitted batches whose results have not been collected"""
+        if kind is None:
+            rows = self._user_db.conn.execute("SELECT batch_id FROM batch_jobs WHERE collected = 0").fetchall()
+        else:
+            rows = self._user_db.conn.execute(
+                "SELECT batch_id FROM batch_jobs WHERE collected = 0 AND kind = ?", (kind,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    async def acollect_batch(self, batch_id: str) -> int:
+        """Store a completed batch's results in the knowledge base and return how many were stored"""
+        row = self._user_db.conn.execute("SELECT kind, items FROM batch_jobs WHERE batch_id = ?", (batch_id,)).fetchone()
+        if not row:
+            raise ValueError("Unknown batch ID")
+        kind, items = row[0], json_loads(row[1])
+
+        batch = await self.client.batches.retrieve(batch_id)
+        if batch.status != "completed" or not batch.output_file_id:
+            logger.info(f"Batch {batch_id} not ready: {batch.status}")
+            return 0
+
+        output = await self.client.files.content(batch.output_file_id)
+        stored = 0
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                result = json_loads(line)
+                item = items[int(result["custom_id"].rsplit("-", 1)[1])]
+                content = result["response"]["body"]["choices"][0]["message"]["content"]
+                if kind == "summary":
+                    self._apply_summary(item, json_loads(content))
+                    stored += 1
+                    continue
+                resource = self._batch_resource(kind, item, content)
+                if self.knowledge_base.update_knowledge_base(item["subject"], resource):
+                    stored += 1
+            except Exception as e:
+                logger.error(f"Error collecting batch result: {e}")
+
+        self._user_db.conn.execute("UPDATE batch_jobs SET collected = 1 WHERE batch_id = ?", (batch_id,))
+
+        logger.info(f"Collected {stored} resources from batch {batch_id}")
+        return stored
+
+    def _batch_resource(self, kind: str, item: Dict, content: str) -> Dict:
+        """Convert one batch completion into a knowledge base resource"""
+        if kind == "objectives":
+            return {
+                "title": f"{item['subject']} learning objectives",
+                "type": "objectives",
+                "content": "\n".join(self._parse_objectives(content))
+            }
+        data = json_loads(content)
+        if kind == "quiz":
+            return {
+                "title": data["question"],
+                "type": "quiz",
+                "content": json_dumps(data),
+                "difficulty": item.get("difficulty", "medium")
+            }
+        return {
+            "title": data.get("title") or item["concept"],
+            "type": "whiteboard",
+            "content": json_dumps(data)
+        }
+
+    def _apply_summary(self, item: Dict, summary: Dict):
+        """Back-fill a batched summary into the matching session history entry"""
+        profile = self.user_profiles.get(item["user_id"])
+        if profile is None:
+            return
+        for entry in profile.session_history:
+            if entry.get("session_id") == item["session_id"]:
+                entry["topics_covered"] = summary.get("topics_covered", [])
+                # A missing or null rating would break the progress plot, so use the fallback summary's
+                entry["performance_rating"] = (summary.get("performance_rating")
+                                               or FALLBACK_SUMMARY_TEMPLATE["performance_rating"])
+                self.record_session(item["user_id"], entry)
+                return
+
+    def _enqueue_summary(self, session: TutoringSession):
+        """Queue a session summary for the Batch API, submitting once SUMMARY_BATCH_SIZE are waiting or the oldest is SUMMARY_MAX_WAIT_S old"""
+        item = {
+            "session_id": session.session_id,
+            "user_id": session.user_id,
+            "subject": session.subject,
+            "learning_objectives": session.learning_objectives,
+            "transcript": session.transcript(SUMMARY_TRANSCRIPT_MAX_CHARS)
+        }
+        conn = self._user_db.conn
+        conn.execute("INSERT OR REPLACE INTO pending_summaries VALUES (?, ?)", (session.session_id, json_dumps(item)))
+        if self._summary_queued_since is None:
+            self._summary_queued_since = time.monotonic()
+        queued = conn.execute("SELECT COUNT(*) FROM pending_summaries").fetchone()[0]
+        if queued >= SUMMARY_BATCH_SIZE:
+            asyncio.run_coroutine_threadsafe(self.asubmit_pending_summaries(), self.loop)
+
+    async def asubmit_pending_summaries(self) -> Optional[str]:
+        """Submit every queued session summary as one batch"""
+        async with self._summary_submit_lock:
+            rows = self._user_db.conn.execute("SELECT session_id, item FROM pending_summaries").fetchall()
+            if not rows:
+                return None
+            try:
+                batch_id = await self.asubmit_batch("summary", [json_loads(row[1]) for row in rows])
+            except Exception as e:
+                logger.error(f"Error submitting summary batch: {e}")
+                return None
+            conn = self._user_db.conn
+            conn.executemany("DELETE FROM pending_summaries WHERE session_id = ?", [(row[0],) for row in rows])
+            # Summaries queued while the batch was being submitted start a fresh wait
+            queued = conn.execute("SELECT COUNT(*) FROM pending_summaries").fetchone()[0]
+            self._summary_queued_since = time.monotonic() if queued else None
+            return batch_id
+
+    async def acollect_summaries(self, submit: bool = True):
+        """Submit leftover queued summaries (unless submit is False) and collect any finished summary batches"""
+        try:
+            if submit:
+                await self.asubmit_pending_summaries()
+            for batch_id in self.pending_batches("summary"):
+                await self.acollect_batch(batch_id)
+        except Exception as e:
+            logger.error(f"Error syncing session summaries: {e}")
+
+    async def _poll_summaries(self):
+        """Sync summaries at startup, then submit overdue queued ones and collect finished batches every SUMMARY_POLL_INTERVAL_S"""
+        await self.acollect_summaries()
+        while True:
+            await asyncio.sleep(SUMMARY_POLL_INTERVAL_S)
+            queued_since = self._summary_queued_since
+            overdue = queued_since is not None and time.monotonic() - queued_since >= SUMMARY_MAX_WAIT_S
+            await self.acollect_summaries(submit=overdue)
+
     def text_to_speech(self, text: str):
-        """Convert text to speech"""
-        self.speech_engine.say(text)
-        self.speech_engine.runAndWait()
+        """Queue text to be spoken by the TTS worker"""
+        self._tts_queue.put(text)
 
     def speech_to_text(self) -> Optional[str]:
         """Convert speech to text"""
-        with sr.Microphone() as source:
+        import speech_recognition as sr
+
+        with sr.Microphone(device_index=self._microphone_index()) as source:
             print("Listening...")
             audio = self.voice_recognizer.listen(source)
             
@@ -746,89 +2100,208 @@ class TutoringEngine:
                 logger.error(f"Speech recognition error: {e}")
                 return None
 
-    def end_session(self, session_id: str) -> Dict:
-        """End a tutoring session and return summary"""
+    def _microphone_index(self) -> Optional[int]:
+        """Resolve the default input device once instead of on every microphone open"""
+        if self._mic_device_index is None:
+            import speech_recognition as sr
+
+            audio = sr.Microphone.get_pyaudio().PyAudio()
+            try:
+                self._mic_device_index = audio.get_default_input_device_info()["index"]
+            except (IOError, OSError) as e:
+                logger.warning(f"Could not resolve default microphone: {e}")
+            finally:
+                audio.terminate()
+        return self._mic_device_index
+
+    def _is_speech(self, window: bytes) -> bool:
+        """Voice activity check with WebRTC VAD when installed, else an energy threshold"""
+        if self._vad is None:
+            try:
+                import webrtcvad
+                self._vad = webrtcvad.Vad(2)
+            except ImportError:
+                self._vad = False
+
+        if self._vad:
+            frame_bytes = VOICE_SAMPLE_RATE * VOICE_FRAME_MS // 1000 * 2
+            return any(
+                self._vad.is_speech(window[i:i + frame_bytes], VOICE_SAMPLE_RATE)
+                for i in range(0, len(window) - frame_bytes + 1, frame_bytes)
+            )
+
+        samples = array("h")
+        samples.frombytes(window[:len(window) - len(window) % 2])
+        if not samples:
+            return False
+        rms = math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+        return rms > self.voice_recognizer.energy_threshold
+
+    def listen_continuously(self, stop_event: threading.Event, on_text: Callable[[str], None]):
+        """Keep the microphone open, cut utterances on voice activity and transcribe each on the engine loop"""
+        import speech_recognition as sr
+
+        frame_samples = VOICE_SAMPLE_RATE * VOICE_FRAME_MS // 1000
+        end_windows = max(1, VOICE_END_SILENCE_MS // VOICE_WINDOW_MS)
+        self._warm_up_stt()
+        with sr.Microphone(device_index=self._microphone_index(), sample_rate=VOICE_SAMPLE_RATE,
+                           chunk_size=frame_samples) as source:
+            # Calibrate the first time voice is enabled, then reuse the measured threshold
+            if self._voice_energy_threshold is None:
+                self.voice_recognizer.adjust_for_ambient_noise(source, duration=1.0)
+                self._voice_energy_threshold = self.voice_recognizer.energy_threshold
+            else:
+                self.voice_recognizer.energy_threshold = self._voice_energy_threshold
+            buffer = SmartAudioBuffer(VOICE_SAMPLE_RATE, VOICE_WINDOW_MS, source.SAMPLE_WIDTH)
+            utterance = bytearray()
+            silent_windows = 0
+
+            while not stop_event.is_set():
+                window = buffer.push(source.stream.read(frame_samples))
+                if window is None:
+                    continue
+                if self._is_speech(window):
+                    utterance.extend(window)
+                    silent_windows = 0
+                elif utterance:
+                    utterance.extend(window)
+                    silent_windows += 1
+                    if silent_windows >= end_windows:
+                        audio = sr.AudioData(bytes(utterance), VOICE_SAMPLE_RATE, source.SAMPLE_WIDTH)
+                        asyncio.run_coroutine_threadsafe(self._transcribe(audio, on_text), self.loop)
+                        utterance.clear()
+                        silent_windows = 0
+
+    def _warm_up_stt(self):
+        """Recognize 100 ms of silence once so the first real utterance skips the cold-start costs"""
+        if self._stt_warmed:
+            return
+        self._stt_warmed = True
+        import speech_recognition as sr
+
+        silence = sr.AudioData(bytes(VOICE_SAMPLE_RATE // 10 * 2), VOICE_SAMPLE_RATE, 2)
+
+        def warm():
+            try:
+                self.voice_recognizer.recognize_google(silence)
+            except Exception:
+                pass  # silence is expected to come back unrecognized
+
+        self._stt_executor.submit(warm)
+
+    async def _transcribe(self, audio, on_text: Callable[[str], None]):
+        """Recognize utterances in order, merging any that queue up behind a running request into one call"""
+        self._stt_pending.append(audio)
+        if self._stt_running:
+            return
+        self._stt_running = True
+        try:
+            while self._stt_pending:
+                batch = [self._stt_pending.popleft() for _ in range(min(STT_BATCH_LIMIT, len(self._stt_pending)))]
+                text = await self._recognize(batch)
+                if text:
+                    on_text(text)
+        finally:
+            self._stt_running = False
+
+    async def _recognize(self, batch: List) -> Optional[str]:
+        import speech_recognition as sr
+
+        audio = batch[0]
+        if len(batch) > 1:
+            gap = bytes(audio.sample_rate * STT_BATCH_GAP_MS // 1000 * audio.sample_width)
+            audio = sr.AudioData(gap.join(a.get_raw_data() for a in batch), audio.sample_rate, audio.sample_width)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._stt_executor, self.voice_recognizer.recognize_google, audio
+            )
+        except Exception as e:
+            logger.warning(f"Speech recognition error: {e}")
+            return None
+
+    def end_session(self, session_id: str, summary_now: bool = False) -> Optional[Dict]:
+        """End a tutoring session and return its summary, or None if it was queued for the Batch API"""
+        return self._run(self.aend_session(session_id, summary_now))
+
+    async def aend_session(self, session_id: str, summary_now: bool = False) -> Optional[Dict]:
+        """Async variant of end_session"""
         if session_id not in self.sessions:
             raise ValueError("Invalid session ID")
             
         session = self.sessions[session_id]
         session.end_time = datetime.datetime.now().isoformat()
+        self._session_locks.pop(session_id, None)
         
-        # Generate session summary
-        summary = self._generate_session_summary(session)
+        # Generate session summary now, or queue it for the cheaper Batch API
+        if summary_now:
+            summary = await self._generate_session_summary(session)
+        else:
+            summary = None
+            self._enqueue_summary(session)
         
         # Update user profile
         if session.user_id in self.user_profiles:
-            self.user_profiles[session.user_id].session_history.append({
+            entry = {
                 "session_id": session_id,
                 "subject": session.subject,
                 "start_time": session.start_time,
                 "end_time": session.end_time,
-                "learning_objectives": session.learning_objectives,
-                "topics_covered": summary['topics_covered'],
-                "performance_rating": summary['performance_rating']
-            })
-        
-        # Save data
-        self.save_user_data()
+                "learning_objectives": session.learning_objectives
+            }
+            if summary:
+                entry["topics_covered"] = summary['topics_covered']
+                entry["performance_rating"] = summary['performance_rating']
+            self.user_profiles[session.user_id].session_history.append(entry)
+            self.record_session(session.user_id, entry)
         
         return summary
 
-    def _generate_session_summary(self, session: TutoringSession) -> Dict:
+    @staticmethod
+    def _summary_request(subject: str, learning_objectives: List[str], transcript: str) -> Dict:
+        """Build the completion request for a session summary"""
+        prompt = (
+            f"Subject: {subject}\n"
+            f"Learning Objectives: {', '.join(learning_objectives)}\n\n"
+            f"Conversation:\n{transcript}"
+        )
+        return {
+            "model": "gpt-4",
+            "messages": [
+                {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.3,
+            "response_format": {"type": "json_object"}
+        }
+
+    async def _generate_session_summary(self, session: TutoringSession) -> Dict:
         """Generate a summary of the session"""
         try:
-            messages_text = "\n".join(
-                f"{msg['role']}: {msg['content']}" 
-                for msg in session.messages
-            )
-            
-            prompt = f"""
-                Analyze this K-12 tutoring session and generate a comprehensive summary:
-                Subject: {session.subject}
-                Learning Objectives: {', '.join(session.learning_objectives)}
-                
-                Conversation:
-                {messages_text}
-                
-                Provide a JSON response with these fields:
-                - topics_covered: list of main topics discussed
-                - key_learnings: 3-5 key takeaways
-                - suggested_next_steps: recommendations for future study
-                - performance_rating: 1-5 rating of student engagement
-                - areas_for_improvement: concepts needing more work
-                - learning_style_insights: observations about learning style
-                - recommended_resources: suggested learning materials
-            """
-            
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a session analyzer for K-12 education. Provide well-formatted JSON output."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                response_format={"type": "json_object"}
+            # Scoped per student so one learner's rating is never served to another
+            content = await self._cached_completion(
+                "summary",
+                f"{session.subject}:{session.user_id}",
+                **self._summary_request(session.subject, session.learning_objectives,
+                                        session.transcript(SUMMARY_TRANSCRIPT_MAX_CHARS))
             )
             
-            return json.loads(response.choices[0].message["content"])
+            return json_loads(content)
             
         except Exception as e:
             logger.error(f"Error generating session summary: {e}")
-            return {
-                "topics_covered": [f"Core concepts of {session.subject}"],
-                "key_learnings": [
-                    f"Introduction to {session.subject}",
-                    "Basic principles and concepts"
-                ],
-                "suggested_next_steps": [
-                    f"Review basic {session.subject} concepts",
-                    "Practice with more examples"
-                ],
-                "performance_rating": 3,
-                "areas_for_improvement": [f"Advanced {session.subject} concepts"],
-                "learning_style_insights": "Visual learning seemed effective",
-                "recommended_resources": []
-            }
+            return self._fallback_summary(session.subject)
+
+    @staticmethod
+    def _fallback_summary(subject: str) -> Dict:
+        """Fill FALLBACK_SUMMARY_TEMPLATE for a subject"""
+        summary = {}
+        for field, value in FALLBACK_SUMMARY_TEMPLATE.items():
+            if isinstance(value, str):
+                value = value.format(subject=subject)
+            elif isinstance(value, list):
+                value = [item.format(subject=subject) for item in value]
+            summary[field] = value
+        return summary
 
 class ModernTutoringApp:
     def __init__(self, root, engine: TutoringEngine):
@@ -839,6 +2312,17 @@ class ModernTutoringApp:
         self.voice_thread = None
         self.stop_voice_event = threading.Event()
         self.voice_enabled = False
+        self.streaming_reply = False
+        self._streamed_parts: List[str] = []
+        self._scroll_pending = False
+        self._pending_chunks: List[str] = []
+        self._stream_flush_scheduled = False
+        self._stream_lock = threading.Lock()
+        self._image_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image")
+        self._screens: Dict[str, tk.Frame] = {}  # screens built once and re-packed on navigation
+        self._avatar_cache: Dict[Tuple[str, float, Tuple[int, int]], object] = {}  # (path, mtime, size) -> PhotoImage
+        self._history_index: Dict[str, List[Tuple[datetime.datetime, float]]] = {}  # user_id -> (start, minutes) per session
+        self._figures: Dict[str, object] = {}  # analytics Figures, cleared and redrawn on each visit
         
         # Configure main window
         self.root.title("EduMentor AI")
@@ -873,7 +2357,7 @@ class ModernTutoringApp:
         tk.Label(
             logo_frame,
             text="🧠",  # Replace with actual logo
-            font=("Segoe UI", 24),
+            font=get_font(24),
             bg=PRIMARY_COLOR,
             fg=LIGHT_TEXT
         ).pack(side="left", padx=10)
@@ -881,7 +2365,7 @@ class ModernTutoringApp:
         tk.Label(
             logo_frame,
             text="EduMentor AI",
-            font=("Segoe UI", 24, "bold"),
+            font=get_font(24, "bold"),
             bg=PRIMARY_COLOR,
             fg=LIGHT_TEXT
         ).pack(side="left")
@@ -902,7 +2386,7 @@ class ModernTutoringApp:
         tk.Label(
             welcome_card.content_frame,
             text=greeting,
-            font=("Segoe UI", 14),
+            font=get_font(14),
             bg=CARD_COLOR,
             fg=DARK_TEXT
         ).pack(pady=10)
@@ -939,26 +2423,7 @@ class ModernTutoringApp:
         self.clear_window()
         
         # Header
-        header = tk.Frame(self.root, bg=PRIMARY_COLOR, height=80)
-        header.pack(fill="x")
-        
-        tk.Button(
-            header,
-            text="← Back",
-            command=self.create_main_menu,
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT,
-            bd=0,
-            font=("Segoe UI", 10)
-        ).pack(side="left", padx=20)
-        
-        tk.Label(
-            header,
-            text="Login to Your Account",
-            font=("Segoe UI", 18, "bold"),
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT
-        ).pack(side="left", padx=20)
+        self._make_header(self.root, "Login to Your Account", self.create_main_menu)
         
         # Main content
         content = tk.Frame(self.root, bg=LIGHT_BG)
@@ -975,7 +2440,7 @@ class ModernTutoringApp:
         tk.Label(
             form_frame,
             text="User ID:",
-            font=("Segoe UI", 10),
+            font=get_font(10),
             bg=CARD_COLOR,
             fg=DARK_TEXT
         ).pack(anchor="w", pady=(10, 5))
@@ -986,7 +2451,7 @@ class ModernTutoringApp:
         tk.Label(
             form_frame,
             text="Password:",
-            font=("Segoe UI", 10),
+            font=get_font(10),
             bg=CARD_COLOR,
             fg=DARK_TEXT
         ).pack(anchor="w", pady=(10, 5))
@@ -1020,26 +2485,8 @@ class ModernTutoringApp:
         self.clear_window()
         
         # Header
-        header = tk.Frame(self.root, bg=PRIMARY_COLOR, height=80)
-        header.pack(fill="x")
-        
-        tk.Button(
-            header,
-            text="← Back",
-            command=self.create_main_menu if self.current_user else self.show_profile_selection,
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT,
-            bd=0,
-            font=("Segoe UI", 10)
-        ).pack(side="left", padx=20)
-        
-        tk.Label(
-            header,
-            text="Create New Account",
-            font=("Segoe UI", 18, "bold"),
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT
-        ).pack(side="left", padx=20)
+        self._make_header(self.root, "Create New Account",
+                          self.create_main_menu if self.current_user else self.show_profile_selection)
         
         # Main content
         content = tk.Frame(self.root, bg=LIGHT_BG)
@@ -1056,7 +2503,7 @@ class ModernTutoringApp:
         tk.Label(
             form_frame,
             text="Full Name:",
-            font=("Segoe UI", 10),
+            font=get_font(10),
             bg=CARD_COLOR,
             fg=DARK_TEXT
         ).pack(anchor="w", pady=(10, 5))
@@ -1067,7 +2514,7 @@ class ModernTutoringApp:
         tk.Label(
             form_frame,
             text="Learning Style:",
-            font=("Segoe UI", 10),
+            font=get_font(10),
             bg=CARD_COLOR,
             fg=DARK_TEXT
         ).pack(anchor="w", pady=(10, 5))
@@ -1094,7 +2541,7 @@ class ModernTutoringApp:
         tk.Label(
             form_frame,
             text="Proficiency Level:",
-            font=("Segoe UI", 10),
+            font=get_font(10),
             bg=CARD_COLOR,
             fg=DARK_TEXT
         ).pack(anchor="w", pady=(10, 5))
@@ -1166,7 +2613,10 @@ class ModernTutoringApp:
             messagebox.showerror("Error", "Please enter your name")
             return
             
-        user_id = hashlib.sha256(name.encode()).hexdigest()[:8]
+        # Random ids, so two students with the same name never overwrite each other
+        user_id = secrets.token_hex(4)
+        while user_id in self.engine.user_profiles:
+            user_id = secrets.token_hex(4)
         self.current_user = UserProfile(
             user_id=user_id,
             name=name,
@@ -1177,8 +2627,8 @@ class ModernTutoringApp:
         )
         
         # Add to engine
-        self.engine.user_profiles[user_id] = self.current_user
-        self.engine.save_user_data()
+        self.engine.update_user_profile(self.current_user)
+        self.engine.schedule_save()
         
         messagebox.showinfo("Success", f"Account created! Your user ID is: {user_id}")
         self.create_main_menu()
@@ -1186,18 +2636,26 @@ class ModernTutoringApp:
     def show_dashboard(self):
         """Show user dashboard"""
         self.clear_window()
+        if "dashboard" not in self._screens:
+            self._screens["dashboard"] = self._build_dashboard()
+        self._refresh_dashboard()
+        self._screens["dashboard"].pack(expand=True, fill="both")
+
+    def _build_dashboard(self) -> tk.Frame:
+        """Build the dashboard once; per-user parts are filled in by _refresh_dashboard"""
+        screen = tk.Frame(self.root, bg=LIGHT_BG)
         
         # Header with user info
-        header = tk.Frame(self.root, bg=PRIMARY_COLOR, height=80)
+        header = tk.Frame(screen, bg=PRIMARY_COLOR, height=80)
         header.pack(fill="x")
         
         user_info = tk.Frame(header, bg=PRIMARY_COLOR)
         user_info.pack(side="right", padx=20)
         
-        tk.Label(user_info, text=f"Welcome, {self.current_user.name}", 
-                font=("Segoe UI", 12), fg=LIGHT_TEXT, bg=PRIMARY_COLOR).pack(anchor="e")
-        tk.Label(user_info, text=f"Learning Style: {self.current_user.learning_style}", 
-                font=("Segoe UI", 10), fg=LIGHT_TEXT, bg=PRIMARY_COLOR).pack(anchor="e")
+        self._dashboard_welcome = tk.Label(user_info, font=get_font(12), fg=LIGHT_TEXT, bg=PRIMARY_COLOR)
+        self._dashboard_welcome.pack(anchor="e")
+        self._dashboard_style = tk.Label(user_info, font=get_font(10), fg=LIGHT_TEXT, bg=PRIMARY_COLOR)
+        self._dashboard_style.pack(anchor="e")
         
         # Back button
         tk.Button(
@@ -1207,11 +2665,11 @@ class ModernTutoringApp:
             bg=ACCENT_COLOR,
             fg=LIGHT_TEXT,
             bd=0,
-            font=("Segoe UI", 10)
+            font=get_font(10)
         ).pack(side="left", padx=20)
         
         # Main content
-        content = tk.Frame(self.root, bg=LIGHT_BG)
+        content = tk.Frame(screen, bg=LIGHT_BG)
         content.pack(expand=True, fill="both", padx=20, pady=20)
         
         # Navigation sidebar
@@ -1223,6 +2681,7 @@ class ModernTutoringApp:
             ("Session History", self.show_session_history),
             ("Learning Analytics", self.show_analytics),
             ("Settings", self.show_settings),
+            ("Pre-generate Curriculum", self.pregenerate_curriculum),
             ("Exit", self.root.quit)
         ]
         
@@ -1242,16 +2701,38 @@ class ModernTutoringApp:
         dashboard = tk.Frame(content, bg=LIGHT_BG)
         dashboard.pack(expand=True, fill="both", padx=20, pady=20)
         
-        tk.Label(dashboard, text="Dashboard", font=("Segoe UI", 16), 
+        tk.Label(dashboard, text="Dashboard", font=get_font(16), 
                 bg=LIGHT_BG).pack(pady=10)
         
+        # Recent sessions, rebuilt on every show
+        self._dashboard_recent = tk.Frame(dashboard, bg=LIGHT_BG)
+        self._dashboard_recent.pack(fill="x")
+        
+        # Quick start button
+        create_rounded_button(
+            dashboard,
+            "Start New Learning Session", 
+            self.start_new_session,
+            bg=PRIMARY_COLOR,
+            fg=LIGHT_TEXT,
+            radius=20
+        ).pack(pady=30, fill="x")
+        return screen
+
+    def _refresh_dashboard(self):
+        """Update the greeting and recent sessions for the current user"""
+        self._dashboard_welcome.config(text=f"Welcome, {self.current_user.name}")
+        self._dashboard_style.config(text=f"Learning Style: {self.current_user.learning_style}")
+        for widget in self._dashboard_recent.winfo_children():
+            widget.destroy()
+        
         # Recent sessions
         if self.current_user.session_history:
-            recent_frame = tk.Frame(dashboard, bg=LIGHT_BG)
+            recent_frame = tk.Frame(self._dashboard_recent, bg=LIGHT_BG)
             recent_frame.pack(fill="x", pady=10)
             
             tk.Label(recent_frame, text="Recent Sessions:", 
-                    font=("Segoe UI", 12), bg=LIGHT_BG).pack(anchor="w")
+                    font=get_font(12), bg=LIGHT_BG).pack(anchor="w")
             
             for session in self.current_user.session_history[-3:]:
                 session_card = Card(recent_frame)
@@ -1264,47 +2745,60 @@ class ModernTutoringApp:
                         text=f"Rating: {session.get('performance_rating', '?')}/5", 
                         bg=CARD_COLOR).pack(side="right", padx=10)
         else:
-            tk.Label(dashboard, text="No recent sessions", 
+            tk.Label(self._dashboard_recent, text="No recent sessions", 
                     bg=LIGHT_BG).pack(pady=20)
-        
-        # Quick start button
-        create_rounded_button(
-            dashboard,
-            "Start New Learning Session", 
-            self.start_new_session,
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT,
-            radius=20
-        ).pack(pady=30, fill="x")
     
+    def pregenerate_curriculum(self):
+        """Collect finished curriculum batches and submit a new one for a subject"""
+        # Batch API uploads and downloads run on the engine loop and report back through root.after
+        future = asyncio.run_coroutine_threadsafe(self.engine.acollect_curriculum(), self.engine.loop)
+        future.add_done_callback(lambda f: self.root.after(0, self._report_curriculum_collected, f))
+
+        subject = simpledialog.askstring("Pre-generate Curriculum",
+                                         "Enter subject to prepare objectives and quizzes for:",
+                                         parent=self.root)
+        if not subject:
+            return
+
+        future = asyncio.run_coroutine_threadsafe(self.engine.asubmit_curriculum(subject), self.engine.loop)
+        future.add_done_callback(lambda f: self.root.after(0, self._report_curriculum_submitted, subject, f))
+
+    def _report_curriculum_collected(self, future):
+        try:
+            collected = future.result()
+            if collected:
+                messagebox.showinfo("Curriculum", f"Added {collected} pre-generated resources to the knowledge base")
+        except Exception as e:
+            logger.error(f"Error collecting curriculum batches: {e}")
+
+    def _report_curriculum_submitted(self, subject: str, future):
+        try:
+            batch_ids = future.result()
+            messagebox.showinfo(
+                "Curriculum",
+                f"Submitted {len(batch_ids)} batches for {subject}. "
+                "Results are usually ready within 24 hours; run this action again to collect them."
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not submit curriculum batch: {str(e)}")
+
     def start_new_session(self):
         """Start a new tutoring session"""
         self.clear_window()
+        if "new_session" not in self._screens:
+            self._screens["new_session"] = self._build_new_session()
+        self.subject_var.set("")
+        self._screens["new_session"].pack(expand=True, fill="both")
+
+    def _build_new_session(self) -> tk.Frame:
+        """Build the subject picker once"""
+        screen = tk.Frame(self.root, bg=LIGHT_BG)
         
         # Header
-        header = tk.Frame(self.root, bg=PRIMARY_COLOR, height=80)
-        header.pack(fill="x")
-        
-        tk.Button(
-            header,
-            text="← Back",
-            command=self.show_dashboard,
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT,
-            bd=0,
-            font=("Segoe UI", 10)
-        ).pack(side="left", padx=20)
-        
-        tk.Label(
-            header,
-            text="New Session",
-            font=("Segoe UI", 18, "bold"),
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT
-        ).pack(side="left", padx=20)
+        self._make_header(screen, "New Session", self.show_dashboard)
         
         # Subject selection
-        content = tk.Frame(self.root, bg=LIGHT_BG)
+        content = tk.Frame(screen, bg=LIGHT_BG)
         content.pack(expand=True, fill="both", padx=100, pady=50)
         
         # Subject selection card
@@ -1314,7 +2808,7 @@ class ModernTutoringApp:
         tk.Label(
             subject_card.content_frame,
             text="Choose a subject to begin:",
-            font=("Segoe UI", 10),
+            font=get_font(10),
             bg=CARD_COLOR,
             fg=DARK_TEXT
         ).pack(pady=10)
@@ -1324,14 +2818,14 @@ class ModernTutoringApp:
                    "Computer Science", "History", "Literature", "English", 
                    "Geography", "Art", "Music", "Physical Education"]
         
-        for subject in subjects:
-            ModernRadioButton(
-                subject_card.content_frame,
-                text=subject,
-                variable=self.subject_var,
-                value=subject,
-                command=lambda: None
-            ).pack(anchor="w", pady=2, padx=20)
+        # One native dropdown instead of a radio button per subject
+        ttk.Combobox(
+            subject_card.content_frame,
+            textvariable=self.subject_var,
+            values=subjects,
+            state="readonly",
+            font=get_font(10)
+        ).pack(anchor="w", pady=2, padx=20, fill="x")
         
         # Start button
         btn_frame = tk.Frame(subject_card.content_frame, bg=CARD_COLOR)
@@ -1352,6 +2846,7 @@ class ModernTutoringApp:
             bg=ACCENT_COLOR,
             radius=20
         ).pack(side="left", padx=10)
+        return screen
     
     def launch_session(self):
         """Launch the actual tutoring session"""
@@ -1360,7 +2855,17 @@ class ModernTutoringApp:
             messagebox.showerror("Error", "Please select a subject")
             return
             
-        self.current_session = self.engine.start_session(self.current_user.user_id, subject)
+        self._run_with_progress(self.engine.astart_session(self.current_user.user_id, subject),
+                                "New Session", "Preparing your session…", self._open_session)
+
+    def _open_session(self, future):
+        """Show the session interface once the engine has started the session"""
+        try:
+            self.current_session = future.result()
+        except Exception as e:
+            logger.error(f"Error starting session: {e}")
+            messagebox.showerror("Error", f"Could not start session: {str(e)}")
+            return
         self.show_session_interface()
     
     def show_session_interface(self):
@@ -1374,7 +2879,7 @@ class ModernTutoringApp:
         tk.Label(
             header,
             text=f"{self.current_session.subject} Session",
-            font=("Segoe UI", 14, "bold"),
+            font=get_font(14, "bold"),
             bg=PRIMARY_COLOR,
             fg=LIGHT_TEXT
         ).pack(side="left", padx=20)
@@ -1401,6 +2906,8 @@ class ModernTutoringApp:
         
         self.conversation_text = ModernScrolledText(chat_card.content_frame)
         self.conversation_text.pack(fill="both", expand=True, pady=5)
+        for sender, color in SENDER_COLORS.items():
+            self.conversation_text.tag_config(sender, foreground=color, font=get_font(10, "bold"))
         self.conversation_text.config(state=tk.DISABLED)
         
         # User input area
@@ -1473,7 +2980,7 @@ class ModernTutoringApp:
             tk.Label(
                 obj_card.content_frame,
                 text=f"• {obj}",
-                font=("Segoe UI", 10),
+                font=get_font(10),
                 bg=CARD_COLOR,
                 fg=DARK_TEXT,
                 wraplength=250,
@@ -1518,26 +3025,21 @@ class ModernTutoringApp:
         # Show typing indicator
         self.conversation_text.config(state=tk.NORMAL)
         self.conversation_text.insert(tk.END, "\nAI Tutor is typing...\n")
-        self.conversation_text.see(tk.END)
+        self.schedule_scroll()
         self.conversation_text.config(state=tk.DISABLED)
-        self.root.update()
         
-        # Get AI response in a separate thread
-        threading.Thread(target=self.get_ai_response, args=(message,), daemon=True).start()
+        # Get AI response on the engine's event loop; results come back through root.after
+        self.streaming_reply = False
+        asyncio.run_coroutine_threadsafe(self.get_ai_response(message), self.engine.loop)
     
-    def get_ai_response(self, message):
-        """Get response from AI tutor"""
+    async def get_ai_response(self, message):
+        """Get response from AI tutor (runs on the engine loop, never touches Tk directly)"""
         try:
-            response, followups = self.engine.get_tutoring_response(
-                self.current_session.session_id, message
+            response, followups = await self.engine.aget_tutoring_response(
+                self.current_session.session_id, message,
+                on_token=self.queue_stream_token
             )
-            
-            # Remove typing indicator
-            self.conversation_text.config(state=tk.NORMAL)
-            self.conversation_text.delete("end-2l linestart", "end-1c")
-            self.conversation_text.config(state=tk.DISABLED)
-            
-            self.display_message("AI Tutor", response)
+            self.root.after(0, self.finish_stream, response)
             
             # Speak the response if voice is enabled
             if hasattr(self, 'voice_enabled') and self.voice_enabled:
@@ -1548,8 +3050,76 @@ class ModernTutoringApp:
             
         except Exception as e:
             logger.error(f"Error getting AI response: {e}")
-            self.display_message("System", f"An error occurred: {str(e)}")
+            self.root.after(0, self.display_message, "System", f"An error occurred: {str(e)}")
     
+    def remove_typing_indicator(self):
+        self.conversation_text.config(state=tk.NORMAL)
+        self.conversation_text.delete("end-2l linestart", "end-1c")
+        self.conversation_text.config(state=tk.DISABLED)
+
+    def schedule_scroll(self):
+        """Scroll the conversation to the end once per idle pass, however many inserts requested it"""
+        if self._scroll_pending:
+            return
+        self._scroll_pending = True
+
+        def scroll():
+            self._scroll_pending = False
+            if self.conversation_text.winfo_exists():
+                self.conversation_text.see(tk.END)
+        self.root.after_idle(scroll)
+
+    def queue_stream_token(self, delta: str):
+        """Buffer a streamed token and schedule a flush if none is pending (called off the Tk thread)"""
+        with self._stream_lock:
+            self._pending_chunks.append(delta)
+            if self._stream_flush_scheduled:
+                return
+            self._stream_flush_scheduled = True
+        self.root.after(STREAM_REDRAW_MS, self.flush_stream_chunks)
+
+    def flush_stream_chunks(self):
+        """Insert all buffered tokens with a single widget update"""
+        with self._stream_lock:
+            text = "".join(self._pending_chunks)
+            self._pending_chunks.clear()
+            self._stream_flush_scheduled = False
+        if text:
+            self.append_stream_token(text)
+
+    def append_stream_token(self, delta: str):
+        """Append streamed text to the tutor's reply"""
+        if not self.streaming_reply:
+            self.remove_typing_indicator()
+            self.streaming_reply = True
+            self._streamed_parts = []
+            self.conversation_text.config(state=tk.NORMAL)
+            self.conversation_text.insert(tk.END, "AI Tutor: ", "AI Tutor")
+        else:
+            self.conversation_text.config(state=tk.NORMAL)
+
+        self._streamed_parts.append(delta)
+        self.conversation_text.insert(tk.END, delta)
+        self.conversation_text.config(state=tk.DISABLED)
+        self.schedule_scroll()
+
+    def finish_stream(self, response: str):
+        """Close the streamed reply, or show the whole response if nothing was streamed"""
+        self.flush_stream_chunks()
+        if self.streaming_reply:
+            self.conversation_text.config(state=tk.NORMAL)
+            self.conversation_text.insert(tk.END, "\n")
+            self.schedule_scroll()
+            self.conversation_text.config(state=tk.DISABLED)
+            self.streaming_reply = False
+
+            # A stream that broke off part way comes back as an error message instead of the reply
+            if response.strip() != "".join(self._streamed_parts).strip():
+                self.display_message("System", response)
+        else:
+            self.remove_typing_indicator()
+            self.display_message("AI Tutor", response)
+
     def toggle_voice_input(self):
         """Toggle voice input mode"""
         if hasattr(self, 'voice_enabled') and self.voice_enabled:
@@ -1560,27 +3130,27 @@ class ModernTutoringApp:
             self.voice_enabled = True
             self.stop_voice_event.clear()
             messagebox.showinfo("Voice Input", "Voice input enabled - press and hold the button to speak")
-            threading.Thread(target=self.voice_input_loop, daemon=True).start()
+            # A listener that has not noticed the stop yet simply carries on, so only one ever reads the mic
+            if self.voice_thread is None or not self.voice_thread.is_alive():
+                self.voice_thread = threading.Thread(target=self.voice_input_loop, daemon=True)
+                self.voice_thread.start()
     
     def voice_input_loop(self):
         """Continuous voice input loop"""
-        while not self.stop_voice_event.is_set():
-            try:
-                with sr.Microphone() as source:
-                    self.engine.voice_recognizer.adjust_for_ambient_noise(source)
-                    audio = self.engine.voice_recognizer.listen(source, timeout=3)
-                    
-                    text = self.engine.voice_recognizer.recognize_google(audio)
-                    self.user_input.delete(0, tk.END)
-                    self.user_input.insert(0, text)
-                    self.send_message()
-                    
-            except sr.WaitTimeoutError:
-                continue
-            except Exception as e:
-                logger.error(f"Voice input error: {e}")
-                continue
+        try:
+            self.engine.listen_continuously(
+                self.stop_voice_event,
+                lambda text: self.root.after(0, self.submit_voice_text, text)
+            )
+        except Exception as e:
+            logger.error(f"Voice input error: {e}")
     
+    def submit_voice_text(self, text: str):
+        """Send recognized speech as the user's message"""
+        self.user_input.delete(0, tk.END)
+        self.user_input.insert(0, text)
+        self.send_message()
+
     def generate_quiz(self):
         """Generate and display a quiz question"""
         difficulty = simpledialog.askstring("Quiz Difficulty", 
@@ -1589,8 +3159,18 @@ class ModernTutoringApp:
         if not difficulty:
             return
             
-        quiz = self.engine.generate_quiz(self.current_session.session_id, difficulty)
-        
+        self._run_with_progress(self.engine.agenerate_quiz(self.current_session.session_id, difficulty),
+                                "Quiz", "Preparing a question…", self._show_quiz)
+
+    def _show_quiz(self, future):
+        """Display a generated quiz question"""
+        try:
+            quiz = future.result()
+        except Exception as e:
+            logger.error(f"Error generating quiz: {e}")
+            messagebox.showerror("Error", f"Could not generate quiz: {str(e)}")
+            return
+
         # Create quiz window
         quiz_win = tk.Toplevel(self.root)
         quiz_win.title(f"{self.current_session.subject} Quiz")
@@ -1598,14 +3178,14 @@ class ModernTutoringApp:
         
         # Display question
         tk.Label(quiz_win, text=quiz['question'], 
-                font=("Segoe UI", 12), wraplength=400).pack(pady=10)
+                font=get_font(12), wraplength=400).pack(pady=10)
         
         # Display options
         self.quiz_var = tk.IntVar()
         for i, option in enumerate(quiz['options']):
             rb = tk.Radiobutton(quiz_win, text=option, 
                                variable=self.quiz_var, value=i,
-                               font=("Segoe UI", 10))
+                               font=get_font(10))
             rb.pack(anchor="w", padx=20, pady=2)
         
         # Submit button
@@ -1633,7 +3213,7 @@ class ModernTutoringApp:
         result_frame.pack(pady=10)
         
         tk.Label(result_frame, text=result, fg=color, 
-                font=("Segoe UI", 12, "bold")).pack()
+                font=get_font(12, "bold")).pack()
         tk.Label(result_frame, text="Explanation: " + quiz['explanation'],
                 wraplength=400).pack()
         
@@ -1658,7 +3238,7 @@ class ModernTutoringApp:
         follow_win.geometry("500x300")
         
         tk.Label(follow_win, text="Here are some follow-up questions you might ask:",
-                font=("Segoe UI", 12)).pack(pady=10)
+                font=get_font(12)).pack(pady=10)
         
         for i, question in enumerate(self.current_followups, 1):
             frame = tk.Frame(follow_win)
@@ -1689,8 +3269,19 @@ class ModernTutoringApp:
         if not concept:
             return
             
-        content = self.engine.generate_whiteboard_content(concept)
-        
+        self._run_with_progress(self.engine.agenerate_whiteboard_content(concept),
+                                "Whiteboard Content", "Generating whiteboard content…",
+                                lambda future: self._show_whiteboard_content(concept, future))
+
+    def _show_whiteboard_content(self, concept: str, future):
+        """Draw generated content on the whiteboard"""
+        try:
+            content = future.result()
+        except Exception as e:
+            logger.error(f"Error generating whiteboard content: {e}")
+            messagebox.showerror("Error", f"Could not generate whiteboard content: {str(e)}")
+            return
+
         # Clear and prepare whiteboard
         self.whiteboard.clear()
         
@@ -1700,61 +3291,77 @@ class ModernTutoringApp:
         # For demo, just show a simple representation
         colors = content.get('color_scheme', [PRIMARY_COLOR, ACCENT_COLOR, "#4fd1c5"])
         
-        # Draw title
-        self.whiteboard.create_text(150, 20, text=content['title'], 
-                                  fill=colors[0], font=("Segoe UI", 12, "bold"))
-        
-        # Simple visualization
-        if "diagram" in concept.lower():
-            # Draw a simple diagram
-            self.whiteboard.create_rectangle(50, 50, 250, 150, 
-                                           outline=colors[0], width=2)
-            self.whiteboard.create_oval(100, 80, 200, 130, 
-                                      outline=colors[1], width=2)
-            self.whiteboard.create_line(150, 50, 150, 150, 
-                                      fill=colors[2], width=2)
-        else:
-            # Draw a concept map
-            self.whiteboard.create_oval(100, 50, 200, 100, 
-                                      outline=colors[0], width=2)
-            self.whiteboard.create_text(150, 75, text=concept[:10], 
-                                      fill=colors[0])
-            
-            self.whiteboard.create_line(150, 100, 100, 150, 
-                                      fill=colors[1], width=2)
-            self.whiteboard.create_oval(75, 150, 125, 200, 
-                                      outline=colors[1], width=2)
-            self.whiteboard.create_text(100, 175, text="Example", 
-                                      fill=colors[1])
-            
-            self.whiteboard.create_line(150, 100, 200, 150, 
-                                      fill=colors[2], width=2)
-            self.whiteboard.create_rectangle(175, 150, 225, 200, 
-                                           outline=colors[2], width=2)
-            self.whiteboard.create_text(200, 175, text="Application", 
-                                      fill=colors[2])
+        # Template items are reused across generations; only their colours and labels change
+        self.whiteboard.show_template(
+            "diagram" if "diagram" in concept.lower() else "concept_map",
+            content['title'],
+            colors,
+            {"concept": concept[:10]}
+        )
     
     def end_current_session(self):
         """End the current tutoring session"""
         if not self.current_session:
             return
             
-        summary = self.engine.end_session(self.current_session.session_id)
+        summary_now = messagebox.askyesno(
+            "Session Summary",
+            "Show the session summary now?\n\nChoose No to have it prepared in the background at lower cost; "
+            "it will appear in your session history once ready."
+        )
+        session = self.current_session
+        self.current_session = None
+        if not summary_now:
+            self.engine.end_session(session.session_id)
+            self.show_dashboard()
+            return
+
+        self._run_with_progress(self.engine.aend_session(session.session_id, summary_now=True),
+                                "Session Summary", "Generating summary…",
+                                lambda future: self._show_session_summary(session, future))
+
+    def _run_with_progress(self, coro, title: str, text: str, on_done: Callable):
+        """Run an engine coroutine behind a modal progress dialog and pass its future to on_done on the Tk thread"""
+        progress_win = tk.Toplevel(self.root)
+        progress_win.title(title)
+        progress_win.transient(self.root)
+        tk.Label(progress_win, text=text, font=get_font(11)).pack(padx=30, pady=(20, 10))
+        progress = ttk.Progressbar(progress_win, mode="indeterminate", length=220)
+        progress.pack(padx=30, pady=(0, 20))
+        progress.start()
+        progress_win.grab_set()
+
+        def finish(future):
+            progress_win.destroy()
+            on_done(future)
+
+        future = asyncio.run_coroutine_threadsafe(coro, self.engine.loop)
+        future.add_done_callback(lambda f: self.root.after(0, finish, f))
+
+    def _show_session_summary(self, session: TutoringSession, future):
+        """Show the finished session summary"""
+        try:
+            summary = future.result()
+        except Exception as e:
+            logger.error(f"Error ending session: {e}")
+            messagebox.showerror("Error", f"Could not end session: {str(e)}")
+            self.show_dashboard()
+            return
         
         # Show summary
         summary_win = tk.Toplevel(self.root)
         summary_win.title("Session Summary")
         summary_win.geometry("600x500")
         
-        tk.Label(summary_win, text=f"Session Summary - {self.current_session.subject}", 
-                font=("Segoe UI", 14, "bold")).pack(pady=10)
+        tk.Label(summary_win, text=f"Session Summary - {session.subject}", 
+                font=get_font(14, "bold")).pack(pady=10)
         
         # Topics covered
         topics_frame = tk.Frame(summary_win)
         topics_frame.pack(fill="x", padx=10, pady=5)
         
         tk.Label(topics_frame, text="Topics Covered:", 
-                font=("Segoe UI", 12, "bold")).pack(anchor="w")
+                font=get_font(12, "bold")).pack(anchor="w")
         for topic in summary['topics_covered']:
             tk.Label(topics_frame, text=f"- {topic}", 
                     wraplength=550, justify="left").pack(anchor="w")
@@ -1764,7 +3371,7 @@ class ModernTutoringApp:
         learnings_frame.pack(fill="x", padx=10, pady=5)
         
         tk.Label(learnings_frame, text="Key Learnings:", 
-                font=("Segoe UI", 12, "bold")).pack(anchor="w")
+                font=get_font(12, "bold")).pack(anchor="w")
         for learning in summary['key_learnings']:
             tk.Label(learnings_frame, text=f"- {learning}", 
                     wraplength=550, justify="left").pack(anchor="w")
@@ -1774,7 +3381,7 @@ class ModernTutoringApp:
         steps_frame.pack(fill="x", padx=10, pady=5)
         
         tk.Label(steps_frame, text="Suggested Next Steps:", 
-                font=("Segoe UI", 12, "bold")).pack(anchor="w")
+                font=get_font(12, "bold")).pack(anchor="w")
         for step in summary['suggested_next_steps']:
             tk.Label(steps_frame, text=f"- {step}", 
                     wraplength=550, justify="left").pack(anchor="w")
@@ -1784,7 +3391,7 @@ class ModernTutoringApp:
         rating_frame.pack(fill="x", padx=10, pady=5)
         
         tk.Label(rating_frame, text=f"Performance Rating: {summary['performance_rating']}/5", 
-                font=("Segoe UI", 12, "bold")).pack(anchor="w")
+                font=get_font(12, "bold")).pack(anchor="w")
         
         # Close button
         create_rounded_button(
@@ -1794,193 +3401,190 @@ class ModernTutoringApp:
             bg=PRIMARY_COLOR,
             radius=20
         ).pack(pady=10, fill="x", padx=50)
-        
-        self.current_session = None
     
+    def _session_index(self) -> List[Tuple[Dict, datetime.datetime, float]]:
+        """Pair each of the current user's sessions with its start and length in minutes, parsing each once"""
+        history = self.current_user.session_history
+        rows = self._history_index.setdefault(self.current_user.user_id, [])
+        if len(rows) > len(history):
+            rows.clear()
+        for session in history[len(rows):]:
+            start = datetime.datetime.fromisoformat(session['start_time'])
+            end = datetime.datetime.fromisoformat(session.get('end_time') or session['start_time'])
+            rows.append((start, (end - start).total_seconds() / 60))
+        # Ratings are read from the sessions themselves since queued summaries fill them in later
+        return [(session, start, minutes) for session, (start, minutes) in zip(history, rows)]
+
     def show_session_history(self):
         """Show user's session history"""
         self.clear_window()
+        if "session_history" not in self._screens:
+            self._screens["session_history"] = self._build_session_history()
+        self._refresh_session_history()
+        self._screens["session_history"].pack(expand=True, fill="both")
+
+    def _build_session_history(self) -> tk.Frame:
+        """Build the history screen once; rows are filled in by _refresh_session_history"""
+        screen = tk.Frame(self.root, bg=LIGHT_BG)
         
         # Header
-        header = tk.Frame(self.root, bg=PRIMARY_COLOR, height=80)
-        header.pack(fill="x")
-        
-        tk.Button(
-            header,
-            text="← Back",
-            command=self.show_dashboard,
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT,
-            bd=0,
-            font=("Segoe UI", 10)
-        ).pack(side="left", padx=20)
-        
-        tk.Label(
-            header,
-            text="Session History",
-            font=("Segoe UI", 18, "bold"),
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT
-        ).pack(side="left", padx=20)
+        self._make_header(screen, "Session History", self.show_dashboard)
         
         # Main content
-        content = tk.Frame(self.root, bg=LIGHT_BG)
+        content = tk.Frame(screen, bg=LIGHT_BG)
         content.pack(expand=True, fill="both", padx=20, pady=20)
         
-        if not self.current_user.session_history:
-            tk.Label(content, text="No session history available", 
-                    bg=LIGHT_BG).pack(pady=50)
-            return
+        self._history_empty = tk.Label(content, text="No session history available", 
+                                       bg=LIGHT_BG)
+        self._history_table = tk.Frame(content, bg=LIGHT_BG)
             
         # Create a treeview for sessions
         columns = ("subject", "date", "duration", "rating")
-        tree = ttk.Treeview(content, columns=columns, show="headings")
+        tree = ttk.Treeview(self._history_table, columns=columns, show="headings")
         
         # Define headings
         tree.heading("subject", text="Subject")
         tree.heading("date", text="Date")
         tree.heading("duration", text="Duration")
         tree.heading("rating", text="Rating")
-        
-        # Add data
-        for session in self.current_user.session_history:
-            start = datetime.datetime.fromisoformat(session['start_time'])
-            end = datetime.datetime.fromisoformat(session.get('end_time', session['start_time']))
-            duration = end - start
-            
-            tree.insert("", tk.END, 
-                        values=(
-                            session['subject'],
-                            start.strftime("%Y-%m-%d"),
-                            str(duration).split(".")[0],
-                            session.get('performance_rating', 'N/A')
-                        ))
-        
         tree.pack(expand=True, fill="both")
         
         # Add scrollbar
-        scrollbar = ttk.Scrollbar(content, orient="vertical", command=tree.yview)
+        scrollbar = ttk.Scrollbar(self._history_table, orient="vertical", command=tree.yview)
         scrollbar.pack(side="right", fill="y")
         tree.configure(yscrollcommand=scrollbar.set)
+        self._history_tree = tree
+        return screen
+
+    def _refresh_session_history(self):
+        """Replace the history rows with the current user's sessions"""
+        tree = self._history_tree
+        tree.delete(*tree.get_children())
+        if not self.current_user.session_history:
+            self._history_table.pack_forget()
+            self._history_empty.pack(pady=50)
+            return
+        self._history_empty.pack_forget()
+        
+        # Add data while the screen is still unmapped, so Tk lays the rows out once
+        rows = [
+            (
+                session['subject'],
+                start.strftime("%Y-%m-%d"),
+                str(datetime.timedelta(minutes=minutes)).split(".")[0],
+                session.get('performance_rating', 'N/A')
+            )
+            for session, start, minutes in self._session_index()
+        ]
+        for values in rows:
+            tree.insert("", tk.END, values=values)
+        self._history_table.pack(expand=True, fill="both")
     
+    def _analytics_axes(self, name: str):
+        """Return a named Figure kept across visits, cleared, with a fresh axes (bypasses pyplot's registry)"""
+        from matplotlib.figure import Figure
+
+        if name not in self._figures:
+            self._figures[name] = Figure(figsize=(6, 4))
+        fig = self._figures[name]
+        fig.clear()
+        return fig, fig.add_subplot()
+
     def show_analytics(self):
         """Show learning analytics dashboard"""
         self.clear_window()
+        if "analytics" not in self._screens:
+            self._screens["analytics"] = self._build_analytics()
+        self._refresh_analytics()
+        self._screens["analytics"].pack(expand=True, fill="both")
+
+    def _build_analytics(self) -> tk.Frame:
+        """Build the analytics screen and its chart canvases once; _refresh_analytics redraws the charts"""
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        screen = tk.Frame(self.root, bg=LIGHT_BG)
         
         # Header
-        header = tk.Frame(self.root, bg=PRIMARY_COLOR, height=80)
-        header.pack(fill="x")
-        
-        tk.Button(
-            header,
-            text="← Back",
-            command=self.show_dashboard,
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT,
-            bd=0,
-            font=("Segoe UI", 10)
-        ).pack(side="left", padx=20)
-        
-        tk.Label(
-            header,
-            text="Learning Analytics",
-            font=("Segoe UI", 18, "bold"),
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT
-        ).pack(side="left", padx=20)
+        self._make_header(screen, "Learning Analytics", self.show_dashboard)
         
         # Main content
-        content = tk.Frame(self.root, bg=LIGHT_BG)
+        content = tk.Frame(screen, bg=LIGHT_BG)
         content.pack(expand=True, fill="both", padx=20, pady=20)
         
-        if not self.current_user.session_history:
-            tk.Label(content, text="No analytics data available", 
-                    bg=LIGHT_BG).pack(pady=50)
-            return
-            
+        self._analytics_empty = tk.Label(content, text="No analytics data available", 
+                                         bg=LIGHT_BG)
+
         # Create analytics charts
-        notebook = ttk.Notebook(content)
-        notebook.pack(expand=True, fill="both")
+        self._analytics_notebook = ttk.Notebook(content)
         
         # Time spent per subject
-        time_frame = tk.Frame(notebook, bg=LIGHT_BG)
-        notebook.add(time_frame, text="Time by Subject")
-        
-        # Prepare data
-        subject_time = {}
-        for session in self.current_user.session_history:
-            start = datetime.datetime.fromisoformat(session['start_time'])
-            end = datetime.datetime.fromisoformat(session.get('end_time', session['start_time']))
-            duration = (end - start).total_seconds() / 60  # in minutes
-            
-            if session['subject'] in subject_time:
-                subject_time[session['subject']] += duration
-            else:
-                subject_time[session['subject']] = duration
-        
-        # Create pie chart
-        fig, ax = plt.subplots(figsize=(6, 4))
-        ax.pie(subject_time.values(), labels=subject_time.keys(), autopct='%1.1f%%')
-        ax.set_title("Time Spent by Subject")
-        
-        canvas = FigureCanvasTkAgg(fig, master=time_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(expand=True, fill="both")
+        time_frame = tk.Frame(self._analytics_notebook, bg=LIGHT_BG)
+        self._analytics_notebook.add(time_frame, text="Time by Subject")
+        time_canvas = FigureCanvasTkAgg(self._analytics_axes("time")[0], master=time_frame)
+        time_canvas.get_tk_widget().pack(expand=True, fill="both")
         
         # Performance over time
-        perf_frame = tk.Frame(notebook, bg=LIGHT_BG)
-        notebook.add(perf_frame, text="Performance Trend")
+        perf_frame = tk.Frame(self._analytics_notebook, bg=LIGHT_BG)
+        self._analytics_notebook.add(perf_frame, text="Performance Trend")
+        perf_canvas = FigureCanvasTkAgg(self._analytics_axes("performance")[0], master=perf_frame)
+        self._analytics_no_ratings = tk.Label(perf_frame, text="No performance data available", 
+                                              bg=LIGHT_BG)
+
+        self._analytics_canvases = {"time": time_canvas, "performance": perf_canvas}
+        return screen
+
+    def _refresh_analytics(self):
+        """Redraw both charts for the current user"""
+        if not self.current_user.session_history:
+            self._analytics_notebook.pack_forget()
+            self._analytics_empty.pack(pady=50)
+            return
+        self._analytics_empty.pack_forget()
+        self._analytics_notebook.pack(expand=True, fill="both")
         
-        # Prepare data
+        # Prepare data for both charts in one pass
+        subject_time = {}
         dates = []
         ratings = []
-        for session in self.current_user.session_history:
+        for session, start, duration in self._session_index():
+            subject_time[session['subject']] = subject_time.get(session['subject'], 0) + duration
             if 'performance_rating' in session:
-                dates.append(datetime.datetime.fromisoformat(session['start_time']))
+                dates.append(start)
                 ratings.append(session['performance_rating'])
         
+        # Create pie chart
+        fig, ax = self._analytics_axes("time")
+        ax.pie(subject_time.values(), labels=subject_time.keys(), autopct='%1.1f%%')
+        ax.set_title("Time Spent by Subject")
+        self._analytics_canvases["time"].draw()
+        
+        perf_widget = self._analytics_canvases["performance"].get_tk_widget()
         if ratings:
-            fig2, ax2 = plt.subplots(figsize=(6, 4))
+            fig2, ax2 = self._analytics_axes("performance")
             ax2.plot(dates, ratings, marker='o')
             ax2.set_title("Performance Over Time")
             ax2.set_ylim(0, 5)
             ax2.set_ylabel("Rating (1-5)")
+            self._analytics_canvases["performance"].draw()
             
-            canvas2 = FigureCanvasTkAgg(fig2, master=perf_frame)
-            canvas2.draw()
-            canvas2.get_tk_widget().pack(expand=True, fill="both")
+            self._analytics_no_ratings.pack_forget()
+            perf_widget.pack(expand=True, fill="both")
         else:
-            tk.Label(perf_frame, text="No performance data available", 
-                    bg=LIGHT_BG).pack(pady=50)
+            perf_widget.pack_forget()
+            self._analytics_no_ratings.pack(pady=50)
     
     def show_settings(self):
         """Show user settings"""
         self.clear_window()
         
-        # Header
-        header = tk.Frame(self.root, bg=PRIMARY_COLOR, height=80)
-        header.pack(fill="x")
-        
-        tk.Button(
-            header,
-            text="← Back",
-            command=self.show_dashboard,
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT,
-            bd=0,
-            font=("Segoe UI", 10)
-        ).pack(side="left", padx=20)
+        # Built off-screen and mapped once at the end, so Tk lays the whole screen out in one pass
+        screen = tk.Frame(self.root, bg=LIGHT_BG)
         
-        tk.Label(
-            header,
-            text="Settings",
-            font=("Segoe UI", 18, "bold"),
-            bg=PRIMARY_COLOR,
-            fg=LIGHT_TEXT
-        ).pack(side="left", padx=20)
+        # Header
+        self._make_header(screen, "Settings", self.show_dashboard)
         
         # Main content
-        content = tk.Frame(self.root, bg=LIGHT_BG)
+        content = tk.Frame(screen, bg=LIGHT_BG)
         content.pack(expand=True, fill="both", padx=50, pady=20)
         
         # User info
@@ -1991,17 +3595,10 @@ class ModernTutoringApp:
         avatar_frame = tk.Frame(user_card.content_frame, bg=CARD_COLOR)
         avatar_frame.pack(pady=5)
         
+        avatar_label = tk.Label(avatar_frame, text="No Avatar", bg=CARD_COLOR)
+        avatar_label.pack(side="left", padx=10)
         if hasattr(self.current_user, 'avatar_path') and self.current_user.avatar_path:
-            try:
-                img = Image.open(self.current_user.avatar_path)
-                img = img.resize((100, 100), Image.Resampling.LANCZOS)
-                self.avatar_img = ImageTk.PhotoImage(img)
-                tk.Label(avatar_frame, image=self.avatar_img, bg=CARD_COLOR).pack(side="left", padx=10)
-            except Exception as e:
-                logger.error(f"Error loading avatar: {e}")
-                tk.Label(avatar_frame, text="No Avatar", bg=CARD_COLOR).pack(side="left", padx=10)
-        else:
-            tk.Label(avatar_frame, text="No Avatar", bg=CARD_COLOR).pack(side="left", padx=10)
+            self.load_avatar(self.current_user.avatar_path, avatar_label)
         
         create_rounded_button(
             avatar_frame,
@@ -2042,7 +3639,66 @@ class ModernTutoringApp:
             bg=PRIMARY_COLOR,
             radius=20
         ).pack(pady=20, fill="x")
+        screen.pack(expand=True, fill="both")
     
+    def load_avatar(self, path: str, label: tk.Label, size: Tuple[int, int] = (100, 100)):
+        """Show an avatar in label, decoding it on the image worker unless already cached"""
+        try:
+            key = (path, os.path.getmtime(path), size)
+        except OSError as e:
+            logger.error(f"Error loading avatar: {e}")
+            return
+
+        photo = self._avatar_cache.get(key)
+        if photo is not None:
+            label.config(image=photo, text="")
+            return
+
+        future = self._image_executor.submit(self._decode_avatar, *key)
+        future.add_done_callback(lambda f: self.root.after(0, self._show_avatar, key, f, label))
+
+    @staticmethod
+    def _decode_avatar(path: str, mtime: float, size: Tuple[int, int]):
+        """Decode the avatar's thumbnail from disk, creating it from the source image the first time"""
+        from PIL import Image
+
+        # One thumbnail per (path, size); the mtime suffix tells versions apart so stale ones can be pruned
+        prefix = hashlib.blake2b(f"{path}:{size}".encode(), digest_size=16).hexdigest()
+        thumb_name = f"{prefix}-{int(mtime * 1e6)}.thumb.png"
+        thumb_path = os.path.join(AVATAR_CACHE_DIR, thumb_name)
+        if os.path.exists(thumb_path):
+            with Image.open(thumb_path) as img:
+                return img.copy()  # decodes here rather than in ImageTk.PhotoImage on the Tk thread
+
+        with Image.open(path) as source:
+            source.draft("RGB", size)  # lets JPEG decode straight to a reduced scale
+            img = source.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+        try:
+            os.makedirs(AVATAR_CACHE_DIR, exist_ok=True)
+            img.save(thumb_path)
+            for name in os.listdir(AVATAR_CACHE_DIR):
+                if name.startswith(f"{prefix}-") and name != thumb_name:
+                    os.remove(os.path.join(AVATAR_CACHE_DIR, name))
+        except OSError as e:
+            logger.warning(f"Could not cache avatar thumbnail: {e}")
+        return img
+
+    def _show_avatar(self, key, future, label: tk.Label):
+        try:
+            from PIL import ImageTk
+
+            photo = ImageTk.PhotoImage(future.result())
+        except Exception as e:
+            logger.error(f"Error loading avatar: {e}")
+            return
+
+        path, _, size = key
+        for stale in [k for k in self._avatar_cache if k[0] == path and k[2] == size]:
+            del self._avatar_cache[stale]
+        self._avatar_cache[key] = photo
+        if label.winfo_exists():
+            label.config(image=photo, text="")
+
     def change_avatar(self):
         """Change user avatar image"""
         file_path = filedialog.askopenfilename(
@@ -2056,8 +3712,8 @@ class ModernTutoringApp:
                 self.current_user.avatar_path = file_path
                 
                 # Update in engine
-                self.engine.user_profiles[self.current_user.user_id] = self.current_user
-                self.engine.save_user_data()
+                self.engine.update_user_profile(self.current_user)
+                self.engine.schedule_save()
                 
                 # Refresh settings view
                 self.show_settings()
@@ -2071,8 +3727,8 @@ class ModernTutoringApp:
             self.voice_enabled = self.voice_var.get()
             
             # Save to engine
-            self.engine.user_profiles[self.current_user.user_id] = self.current_user
-            self.engine.save_user_data()
+            self.engine.update_user_profile(self.current_user)
+            self.engine.schedule_save()
             
             messagebox.showinfo("Success", "Settings saved successfully")
             self.show_dashboard()
@@ -2083,32 +3739,63 @@ class ModernTutoringApp:
         """Display a message in the conversation window"""
         self.conversation_text.config(state=tk.NORMAL)
         
-        # Configure tags for different senders
-        if sender == "You":
-            color = PRIMARY_COLOR
-        elif sender == "AI Tutor":
-            color = SECONDARY_COLOR
-        else:
-            color = DARK_TEXT
-        
-        # Insert sender with appropriate styling
-        self.conversation_text.tag_config(sender, foreground=color, font=("Segoe UI", 10, "bold"))
-        self.conversation_text.insert(tk.END, f"{sender}: ", sender)
+        # Other senders get their styling the first time they appear
+        if sender not in SENDER_COLORS and sender not in self.conversation_text.tag_names():
+            self.conversation_text.tag_config(sender, foreground=DARK_TEXT, font=get_font(10, "bold"))
         
-        # Insert message
-        self.conversation_text.insert(tk.END, f"{message}\n")
+        # Insert the styled sender and the message in one call
+        self.conversation_text.insert(tk.END, f"{sender}: ", sender, f"{message}\n")
         
-        self.conversation_text.see(tk.END)
+        self.schedule_scroll()
         self.conversation_text.config(state=tk.DISABLED)
     
+    def _make_header(self, parent, title: str, back_command: Callable) -> tk.Frame:
+        """Build the standard screen header: a back button and the screen title"""
+        header = tk.Frame(parent, bg=PRIMARY_COLOR, height=80)
+        header.pack(fill="x")
+        
+        tk.Button(
+            header,
+            text="← Back",
+            command=back_command,
+            bg=PRIMARY_COLOR,
+            fg=LIGHT_TEXT,
+            bd=0,
+            font=get_font(10)
+        ).pack(side="left", padx=20)
+        
+        tk.Label(
+            header,
+            text=title,
+            font=get_font(18, "bold"),
+            bg=PRIMARY_COLOR,
+            fg=LIGHT_TEXT
+        ).pack(side="left", padx=20)
+        return header
+
     def clear_window(self):
-        """Clear all widgets from the window"""
+        """Hide cached screens and destroy every other widget in the window"""
+        cached = {str(screen) for screen in self._screens.values()}
         for widget in self.root.winfo_children():
-            widget.destroy()
+            if str(widget) in cached:
+                widget.pack_forget()
+            else:
+                widget.destroy()
+
+def preload_modules(*names: str):
+    """Import heavy modules ahead of first use, ignoring any that are not installed"""
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
 
 def main():
-    # Initialize components
-    knowledge_base = LocalKnowledgeBase()
+    # Open the knowledge base and import the client and cache libraries while the user types the API key
+    startup = ThreadPoolExecutor(max_workers=1, thread_name_prefix="startup")
+    knowledge_base_future = startup.submit(LocalKnowledgeBase)
+    startup.submit(preload_modules, "httpx", "openai", "numpy", "tiktoken")
+    startup.shutdown(wait=False)
     
     # Get API key from user
     root = tk.Tk()
@@ -2120,7 +3807,7 @@ def main():
         return
 
     # Initialize engine
-    engine = TutoringEngine(api_key=api_key, knowledge_base=knowledge_base)
+    engine = TutoringEngine(api_key=api_key, knowledge_base=knowledge_base_future.result())
     
     # Create and configure main window
     root.deiconify()  # Make visible
@@ -2133,6 +3820,7 @@ def main():
     # Start the application
     app = ModernTutoringApp(root, engine)
     root.mainloop()
+    engine.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file